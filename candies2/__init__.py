@@ -3,14 +3,14 @@ from version import VERSION as __revision__
 # common
 from common import Margin, Padding, Spacing
 # containers
-from container import BaseContainer
+from container import BaseContainer, PreferredSizeCache, AllocationCache, PaintCulling
 from box import Box, VBox, HBox
 from flowbox import FlowBox
 from block import TexturedBlock
 from aligner import Aligner
 from multilayer import MultiLayerContainer
 from table import Table
-from list import LightList
+from list import LightList, VariableLightList
 from autoscroll import AutoScrollPanel
 from tooltip import ToolTipManager
 from slider import Slider
@@ -19,8 +19,16 @@ from circle import Circle
 from percentround import PercentRound
 from disk import Disk
 from roundrect import OutlinedRoundRectangle, RoundRectangle
+from materials import TintCache
+from nineslice import CornerCache, paint_round_rectangle
+from texturecache import TextureCache, set_texture_from_file
+from atlas import TextureAtlas, AtlasRegion, AtlasImage
+from imageloader import ImageLoader, start_image_loader
+from thumbnails import ThumbnailLoader
 from clock import Clock
-from stattracer import Tracer
+from stattracer import Tracer, TracerSeries
+from rectbatch import RectBatch
+from pixeltexture import PixelTexture
 
 from scrollbar import Scrollbar, Clipper
 from progressbar import ProgressBar
@@ -29,7 +37,9 @@ from dropdown import OptionLine, Select
 from text import StretchText, TextContainer
 from buttons import ClassicButton, ImageButton
 from clicking import SimpleClick, LongClick
+from kinetic import KineticScroller
 from clickcatcher import ClickCatcher
+from hittest import HitTester, SpatialGrid
 
 from checkbox import CheckButton, CheckBox
 from radiobutton import RadioButton, RadioBox
@@ -3,8 +3,9 @@
 
 import clutter
 import common
+from container import PreferredSizeCache
 
-class Aligner(clutter.Actor, clutter.Container):
+class Aligner(PreferredSizeCache, clutter.Actor, clutter.Container):
     __gtype_name__ = 'Aligner'
     
     ALIGNMENT = ('top_left', 'top', 'top_right', 'left', 'center', 'right', 'bottom_left', 'bottom', 'bottom_right')
@@ -64,7 +65,10 @@ class Aligner(clutter.Actor, clutter.Container):
             self.background.destroy()
             self.background = None
     
-    def do_get_preferred_width(self, for_height):
+    do_get_preferred_width = PreferredSizeCache.do_get_preferred_width
+    do_get_preferred_height = PreferredSizeCache.do_get_preferred_height
+
+    def _compute_preferred_width(self, for_height):
         preferred_width = 2*self._margin.x + 2*self._padding.x
         
         if self.element:
@@ -89,7 +93,7 @@ class Aligner(clutter.Actor, clutter.Container):
         
         return preferred_width, preferred_width
     
-    def do_get_preferred_height(self, for_width):
+    def _compute_preferred_height(self, for_width):
         preferred_height = 2*self._margin.y + 2*self._padding.y
         
         if self.element:
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*
+
+import gobject
+import clutter
+from clutter import cogl
+from materials import TINTS, TINT_ENABLED
+from texturecache import set_texture_from_file
+
+try:
+    from gtk import gdk
+except ImportError:
+    gdk = None
+
+
+class AtlasRegion(object):
+    """
+    Part of a texture: texture coordinates are inset by half a texel so that
+    filtering does not take pixels of the neighbouring images. The opacity
+    is applied with a material of TINTS, it is ignored without cogl
+    materials.
+    """
+
+    def __init__(self, texture, width, height, tx1=0.0, ty1=0.0, tx2=1.0, ty2=1.0):
+        self.texture = texture
+        self.width = width
+        self.height = height
+        self.coords = (tx1, ty1, tx2, ty2)
+
+    def paint(self, x1, y1, x2, y2, opacity=255):
+        if opacity >= 255 or not TINTS.set_source(self.texture, 255, 255, 255, opacity):
+            cogl.set_source_texture(self.texture)
+        cogl.rectangle_with_texture_coords(x1, y1, x2, y2, *self.coords)
+
+
+class _AtlasPage(object):
+    """A page texture filled with shelves of images"""
+
+    def __init__(self, size):
+        self.size = size
+        self.holder = clutter.Texture()
+        self.holder.set_from_rgb_data(buffer(bytearray(size * size * 4)), True, size, size, size * 4, 4, 0)
+        self.texture = self.holder.get_cogl_texture()
+        # shelves are [y, height, next x]
+        self._shelves = list()
+        self._next_y = 0
+
+    def allocate(self, width, height):
+        """Returns the position of a width x height image, or None if the page is full"""
+        for shelf in self._shelves:
+            y, shelf_height, x = shelf
+            if height <= shelf_height and x + width <= self.size:
+                shelf[2] = x + width
+                return x, y
+        if self._next_y + height > self.size or width > self.size:
+            return None
+        self._shelves.append([self._next_y, height, width])
+        self._next_y += height
+        return 0, self._shelves[-1][0]
+
+
+class TextureAtlas(object):
+    """
+    Packs small images into a few large page textures, so that actors
+    painting them do not switch textures and cogl can batch their
+    rectangles. Images are registered with register and packed when one of
+    them is first requested with get_region (or when build is called).
+    Images can be added after the first build, they take the free space of
+    the last page or a new page.
+
+    Images bigger than max_image_size, and all images when gtk.gdk is not
+    available to decode them, get a region covering their own texture.
+    """
+    # transparent pixels between images
+    PADDING = 1
+
+    def __init__(self, page_size=1024, max_image_size=128):
+        self.page_size = page_size
+        self.max_image_size = max_image_size
+        self._pending = list()
+        self._regions = dict()
+        self._pages = list()
+
+    def get_pages_count(self):
+        return len(self._pages)
+
+    def register(self, path):
+        if path not in self._regions and path not in self._pending:
+            self._pending.append(path)
+
+    def build(self):
+        pending = self._pending
+        self._pending = list()
+        images = list()
+        for path in pending:
+            if gdk is None:
+                self._regions[path] = self._load_alone(path)
+                continue
+            pixbuf = gdk.pixbuf_new_from_file(path)
+            if pixbuf.get_width() > self.max_image_size or pixbuf.get_height() > self.max_image_size:
+                self._regions[path] = self._load_alone(path)
+            else:
+                images.append((path, pixbuf))
+        # higher images first, shelves are less wasted
+        images.sort(key=lambda image: image[1].get_height(), reverse=True)
+        for path, pixbuf in images:
+            self._regions[path] = self._pack(pixbuf)
+
+    def get_region(self, path):
+        region = self._regions.get(path)
+        if region is None:
+            self.register(path)
+            self.build()
+            region = self._regions[path]
+        return region
+
+    def _load_alone(self, path):
+        texture = cogl.texture_new_from_file(path, cogl.TEXTURE_NO_SLICING, cogl.PIXEL_FORMAT_ANY)
+        if hasattr(texture, 'get_width'):
+            width, height = texture.get_width(), texture.get_height()
+        else:
+            width, height = cogl.texture_get_width(texture), cogl.texture_get_height(texture)
+        return AtlasRegion(texture, width, height)
+
+    def _pack(self, pixbuf):
+        width = pixbuf.get_width()
+        height = pixbuf.get_height()
+        padded_width = width + 2 * self.PADDING
+        padded_height = height + 2 * self.PADDING
+        position = None
+        if self._pages:
+            page = self._pages[-1]
+            position = page.allocate(padded_width, padded_height)
+        if position is None:
+            page = _AtlasPage(self.page_size)
+            self._pages.append(page)
+            position = page.allocate(padded_width, padded_height)
+        x = position[0] + self.PADDING
+        y = position[1] + self.PADDING
+        page.holder.set_area_from_rgb_data(pixbuf.get_pixels(), pixbuf.get_has_alpha(), x, y, width, height, pixbuf.get_rowstride(), pixbuf.get_n_channels(), 0)
+        size = float(page.size)
+        return AtlasRegion(page.texture, width, height,
+                           (x + 0.5) / size, (y + 0.5) / size,
+                           (x + width - 0.5) / size, (y + height - 0.5) / size)
+
+ICONS = TextureAtlas()
+
+
+class AtlasImage(clutter.Actor):
+    """
+    AtlasImage (clutter.Actor)
+
+    An actor painting a region of a TextureAtlas, stretched to its allocation.
+
+    Without cogl materials, an image set from a file is painted by a
+    clutter.Texture when the actor is not opaque, so that it still fades.
+    """
+    __gtype_name__ = 'AtlasImage'
+
+    def __init__(self, path=None, atlas=ICONS):
+        clutter.Actor.__init__(self)
+        self._atlas = atlas
+        self._region = None
+        self._texture = None
+        if path:
+            self.set_from_file(path)
+
+    def set_from_file(self, path):
+        self.set_region(self._atlas.get_region(path))
+        if not TINT_ENABLED:
+            if self._texture is None:
+                self._texture = clutter.Texture()
+                self._texture.set_parent(self)
+            set_texture_from_file(self._texture, path)
+
+    def set_region(self, region):
+        self._region = region
+        if self._texture is not None:
+            self._texture.unparent()
+            self._texture.destroy()
+            self._texture = None
+        self.queue_relayout()
+
+    def get_region(self):
+        return self._region
+
+    def do_get_preferred_width(self, for_height):
+        if self._region is None:
+            return 0, 0
+        return self._region.width, self._region.width
+
+    def do_get_preferred_height(self, for_width):
+        if self._region is None:
+            return 0, 0
+        return self._region.height, self._region.height
+
+    def do_allocate(self, box, flags):
+        if self._texture is not None:
+            texture_box = clutter.ActorBox()
+            texture_box.x2 = box.x2 - box.x1
+            texture_box.y2 = box.y2 - box.y1
+            self._texture.allocate(texture_box, flags)
+        clutter.Actor.do_allocate(self, box, flags)
+
+    def do_paint(self):
+        if self._region is not None:
+            opacity = self.get_paint_opacity()
+            if opacity < 255 and self._texture is not None:
+                self._texture.paint()
+            else:
+                (x1, y1, x2, y2) = self.get_allocation_box()
+                self._region.paint(0, 0, x2 - x1, y2 - y1, opacity)
+
+    def do_destroy(self):
+        self.unparent()
+        if self._texture is not None:
+            self._texture.unparent()
+            self._texture.destroy()
+            self._texture = None
+
+gobject.type_register(AtlasImage)
@@ -8,24 +8,43 @@ from box import HBox
 # auto scroll panel
 #------------------------------------------------------------------------------------------
 class AutoScrollPanel(HBox):
-    def __init__(self, actor=None, padding=0, spacing=0):
+    '''
+    A panel adding a scrollbar when its actor is higher than the panel.
+    If kinetic is True, the actor can also be scrolled by dragging it.
+    
+    The actor is always inside a clipper, the scrollbar is only shown or
+    hidden. Once displayed, the scrollbar is hidden again only when the
+    actor is smaller than the panel height minus hysteresis (in pixels).
+    The actor preferred height is cached until the actor queues a relayout
+    or check_scrollbar is called.
+    '''
+    def __init__(self, actor=None, padding=0, spacing=0, kinetic=False, hysteresis=10):
         HBox.__init__(self, spacing=spacing, padding=padding)
         self.connect('notify::visible', self.on_show_scrolled)
         self.contents_have_been_shown = False
+        self.hysteresis = hysteresis
         self._max_width = 0
         self._max_height = 0
-        self._actor = actor
-        if self._actor:
-            self.add_element(self._actor, 'actor', expand=True, resizable=1.0)
+        self._content_height = None
+        self._actor_handler = None
+        self._has_scrollbar = False
         
         self._scrollbar = Scrollbar()
-        self._clipper = Clipper(expand=True)
+        self._scrollbar.hide()
+        self._clipper = Clipper(expand=True, kinetic=kinetic)
         self._scrollbar.connect('scroll_position', self._clipper.callback_position)
+        self._clipper.connect('scroll_position', self._scrollbar.callback_position)
+        self.add_element(self._clipper, 'clipper', expand=True, resizable=1.0)
+        self.add_element(self._scrollbar, 'scrollbar', expand=True)
+        
+        self._actor = None
+        if actor:
+            self.set_actor(actor)
 
     def on_show_scrolled(self, panel, event):
         if not self.contents_have_been_shown:
             self.contents_have_been_shown = True
-        else:
+        elif self._actor is not None:
             self._actor.props.visible = self.props.visible
 
     def get_actor(self):
@@ -34,17 +53,31 @@ class AutoScrollPanel(HBox):
     def set_actor(self, element):
         self.remove_actor()
         self._actor = element
-        self.add_element(self._actor, 'actor', expand=True, resizable=1.0)
+        self._clipper.set_actor(self._actor)
+        try:
+            self._actor_handler = self._actor.connect('queue-relayout', self._on_actor_queue_relayout)
+        except TypeError:
+            # signal not available with old clutter versions
+            self._actor_handler = None
+        self._content_height = None
+        self.queue_relayout()
     
     def remove_actor(self):
         if self._actor is not None:
-            self.remove_all_elements()
+            if self._actor_handler is not None:
+                self._actor.disconnect(self._actor_handler)
+                self._actor_handler = None
             self._clipper.remove_actor()
             self._actor.set_anchor_point(0, 0)
             self._actor.remove_clip()
             self._actor = None
+            self._content_height = None
+            self._set_scrollbar_displayed(False)
             self._scrollbar.go_to_top()
     
+    def _on_actor_queue_relayout(self, actor):
+        self._content_height = None
+    
     def set_bar_image_path(self, path):
         self._scrollbar.set_bar_image_path(path)
     
@@ -63,53 +96,80 @@ class AutoScrollPanel(HBox):
     def get_scrollbar(self):
         return self._scrollbar
     
+    def set_kinetic(self, kinetic):
+        self._clipper.set_kinetic(kinetic)
+    
     def has_scrollbar(self):
-        return self._clipper.get_actor() is not None
+        return self._has_scrollbar
+    
+    def _measure_elements(self):
+        measures = HBox._measure_elements(self)
+        if not self._has_scrollbar:
+            # the hidden scrollbar takes no place, as in do_allocate
+            measures = [measure for measure in measures if measure[0]['object'] is not self._scrollbar]
+        return measures
+    
+    def _get_content_height(self, for_width):
+        if self._content_height is None or self._content_height[0] != for_width:
+            self._content_height = (for_width, self._actor.get_preferred_height(for_width=for_width)[1])
+        return self._content_height[1]
+    
+    def _set_scrollbar_displayed(self, displayed):
+        if displayed and not self._has_scrollbar:
+            self._has_scrollbar = True
+            self._scrollbar.show()
+        elif not displayed and self._has_scrollbar:
+            self._has_scrollbar = False
+            if self._scrollbar.is_pointer_grabbed():
+                # freeze if pointer is not ungrabbed
+                clutter.ungrab_pointer()
+            self.go_to_top()
+            self._scrollbar.hide()
     
     # Function to check and add a scrollbar if needed
     def check_scrollbar(self, relayout=True):
-        #print '---------------------------', self._max_height
+        # the actor content may have changed
+        self._content_height = None
+        self._check_scrollbar()
+        if relayout:
+            self.queue_relayout()
+    
+    def _check_scrollbar(self):
         if self._max_height > 0 and self._actor is not None:
             if self._max_width > 0:
                 for_width = self._max_width
             else:
                 for_width = -1
-            preferred_height = self._actor.get_preferred_height(for_width=for_width)[1]
-            #print '--------------------------- preferred_height', self._max_height, preferred_height
-            if preferred_height > self._max_height:
-                #print '--------------------------- add scrollbar'
-                if self.get_by_name('scrollbar') is None:
-                    #print '--------------------------- add scrollbar confirm'
-                    self.remove_all_elements()
-                    self._clipper.set_actor(self._actor)
-                    self.add_element(self._clipper, 'clipper', expand=True, resizable=1.0)
-                    self.add_element(self._scrollbar, 'scrollbar', expand=True)
+            preferred_height = self._get_content_height(for_width)
+            if self._has_scrollbar:
+                self._set_scrollbar_displayed(preferred_height > self._max_height - self.hysteresis)
             else:
-                if self.get_by_name('actor') is None:
-                    if self._scrollbar.is_pointer_grabbed():
-                        # freeze if pointer is not ungrabbed
-                        clutter.ungrab_pointer()
-                    self.remove_all_elements()
-                    self._clipper.remove_actor()
-                    self._actor.set_anchor_point(0, 0)
-                    self._actor.remove_clip()
-                    self.go_to_top()
-                    self.add_element(self._actor, 'actor', expand=True, resizable=1.0)
-        if relayout:
-            self.queue_relayout()
+                self._set_scrollbar_displayed(preferred_height > self._max_height)
     
     def do_allocate(self, box, flags):
         new_width = box.x2 - box.x1
         new_height = box.y2 - box.y1
-        #print '--------------------------- allocate', new_width, new_height
-        if new_width != self._max_width or new_height != self._max_height:
+        if new_width != self._max_width or new_height != self._max_height or self._content_height is None:
             self._max_width = new_width
             self._max_height = new_height
-            #print '--------------------------- max', self._max_width, self._max_height
-            self.check_scrollbar(relayout=False)
-        HBox.do_allocate(self, box, flags)
+            self._check_scrollbar()
+        if self._has_scrollbar:
+            HBox.do_allocate(self, box, flags)
+        else:
+            # the hidden scrollbar takes no place
+            clipper_box = clutter.ActorBox()
+            clipper_box.x1 = self._margin.x + self._padding.x
+            clipper_box.y1 = self._margin.y + self._padding.y
+            clipper_box.x2 = new_width - self._margin.x - self._padding.x
+            clipper_box.y2 = new_height - self._margin.y - self._padding.y
+            self._clipper.allocate(clipper_box, flags)
+            clutter.Actor.do_allocate(self, box, flags)
     
     def do_destroy(self):
+        if hasattr(self, "_actor") and self._actor is not None:
+            if self._actor_handler is not None:
+                self._actor.disconnect(self._actor_handler)
+                self._actor_handler = None
         if hasattr(self, "_scrollbar"):
             try:
                 self.remove_element("scrollbar")
@@ -123,4 +183,3 @@ class AutoScrollPanel(HBox):
                 pass
             self._clipper.destroy()
         HBox.do_destroy(self)
-
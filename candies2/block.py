@@ -1,14 +1,35 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
 import gobject
 import clutter
 from clutter import cogl
 import common
-from container import BaseContainer
+from container import BaseContainer, PreferredSizeCache
 from text import TextContainer
+from atlas import AtlasRegion, ICONS
 
-class TexturedBlock(BaseContainer):
+
+TEXTURES_PACKAGE_PIECES = ('top_left', 'top', 'top_right',
+                           'middle_left', 'middle', 'middle_right',
+                           'bottom_left', 'bottom', 'bottom_right',
+                           'title_left', 'title_middle', 'title_right')
+
+def load_textures_package(textures_path, extension='.png', atlas=ICONS):
+    '''Returns a textures package of atlas regions from the pieces images found in textures_path'''
+    paths = dict()
+    for piece in TEXTURES_PACKAGE_PIECES:
+        path = '%s%s%s' % (textures_path, piece, extension)
+        if os.path.exists(path):
+            paths[piece] = path
+            atlas.register(path)
+    package = dict()
+    for piece, path in paths.iteritems():
+        package[piece] = atlas.get_region(path)
+    return package
+
+class TexturedBlock(PreferredSizeCache, BaseContainer):
     __gtype_name__ = 'TexturedBlock'
     
     def __init__(self, title=None, title_actor=None, content_actor=None, margin=0, padding=10, spacing=10, title_padding=None, textures_package=None):
@@ -215,7 +236,10 @@ class TexturedBlock(BaseContainer):
     def get_content_actor(self):
         return self.content_actor
     
-    def do_get_preferred_width(self, for_height):
+    do_get_preferred_width = PreferredSizeCache.do_get_preferred_width
+    do_get_preferred_height = PreferredSizeCache.do_get_preferred_height
+
+    def _compute_preferred_width(self, for_height):
         if for_height != -1:
             h = for_height - 2*self._margin.y - 2*self._padding.y
         else:
@@ -231,7 +255,7 @@ class TexturedBlock(BaseContainer):
         preferred_width = 2*self._margin.x + 2*self._padding.x + max_width
         return preferred_width, preferred_width
     
-    def do_get_preferred_height(self, for_width):
+    def _compute_preferred_height(self, for_width):
         if for_width != -1:
             w = for_width - 2*self._margin.x - 2*self._padding.x
         else:
@@ -289,6 +313,14 @@ class TexturedBlock(BaseContainer):
         if self.content_actor:
             func(self.content_actor, data)
     
+    def _paint_piece(self, texture, x1, y1, x2, y2):
+        # pieces are cogl textures or regions of a TextureAtlas
+        if isinstance(texture, AtlasRegion):
+            texture.paint(x1, y1, x2, y2)
+        else:
+            cogl.set_source_texture(texture)
+            cogl.rectangle(x1, y1, x2, y2)
+    
     def _paint_background(self):
         if self.width > 0 and self.height > 0:
             x1 = self._margin.x
@@ -302,58 +334,31 @@ class TexturedBlock(BaseContainer):
             
             # top_left texture
             if self._top_left:
-                cogl.path_rectangle(x1, y1, x2, y2)
-                cogl.path_close()
-                cogl.set_source_texture(self._top_left)
-                cogl.path_fill()
+                self._paint_piece(self._top_left, x1, y1, x2, y2)
             # top texture
             if self._top:
-                cogl.path_rectangle(x2, y1, x3, y2)
-                cogl.path_close()
-                cogl.set_source_texture(self._top)
-                cogl.path_fill()
+                self._paint_piece(self._top, x2, y1, x3, y2)
             # top_right texture
             if self._top_right:
-                cogl.path_rectangle(x3, y1, x4, y2)
-                cogl.path_close()
-                cogl.set_source_texture(self._top_right)
-                cogl.path_fill()
+                self._paint_piece(self._top_right, x3, y1, x4, y2)
             # middle_left texture
             if self._middle_left:
-                cogl.path_rectangle(x1, y2, x2, y3)
-                cogl.path_close()
-                cogl.set_source_texture(self._middle_left)
-                cogl.path_fill()
+                self._paint_piece(self._middle_left, x1, y2, x2, y3)
             # middle texture
             if self._middle:
-                cogl.path_rectangle(x2, y2, x3, y3)
-                cogl.path_close()
-                cogl.set_source_texture(self._middle)
-                cogl.path_fill()
+                self._paint_piece(self._middle, x2, y2, x3, y3)
             # middle_right texture
             if self._middle_right:
-                cogl.path_rectangle(x3, y2, x4, y3)
-                cogl.path_close()
-                cogl.set_source_texture(self._middle_right)
-                cogl.path_fill()
+                self._paint_piece(self._middle_right, x3, y2, x4, y3)
             # bottom_left texture
             if self._bottom_left:
-                cogl.path_rectangle(x1, y3, x2, y4)
-                cogl.path_close()
-                cogl.set_source_texture(self._bottom_left)
-                cogl.path_fill()
+                self._paint_piece(self._bottom_left, x1, y3, x2, y4)
             # bottom texture
             if self._bottom:
-                cogl.path_rectangle(x2, y3, x3, y4)
-                cogl.path_close()
-                cogl.set_source_texture(self._bottom)
-                cogl.path_fill()
+                self._paint_piece(self._bottom, x2, y3, x3, y4)
             # bottom_right texture
             if self._bottom_right:
-                cogl.path_rectangle(x3, y3, x4, y4)
-                cogl.path_close()
-                cogl.set_source_texture(self._bottom_right)
-                cogl.path_fill()
+                self._paint_piece(self._bottom_right, x3, y3, x4, y4)
             
             title_x1 = self._margin.x + self._padding.x
             title_x2 = self._margin.y + self._padding.x + self._title_textures_size
@@ -363,22 +368,13 @@ class TexturedBlock(BaseContainer):
             title_y2 = self._margin.y + self._padding.y + 2*self._title_padding.y + self._title_height
             # title_left texture
             if self._title_left:
-                cogl.path_rectangle(title_x1, title_y1, title_x2, title_y2)
-                cogl.path_close()
-                cogl.set_source_texture(self._title_left)
-                cogl.path_fill()
+                self._paint_piece(self._title_left, title_x1, title_y1, title_x2, title_y2)
             # title texture
             if self._title_middle:
-                cogl.path_rectangle(title_x2, title_y1, title_x3, title_y2)
-                cogl.path_close()
-                cogl.set_source_texture(self._title_middle)
-                cogl.path_fill()
+                self._paint_piece(self._title_middle, title_x2, title_y1, title_x3, title_y2)
             # title_right texture
             if self._title_right:
-                cogl.path_rectangle(title_x3, title_y1, title_x4, title_y2)
-                cogl.path_close()
-                cogl.set_source_texture(self._title_right)
-                cogl.path_fill()
+                self._paint_piece(self._title_right, title_x3, title_y1, title_x4, title_y2)
     
     def _paint_light(self):
         x1 = self._margin.x + self._padding.x
@@ -3,8 +3,9 @@
 
 import clutter
 import common
+from container import PreferredSizeCache, AllocationCache, PaintCulling
 
-class Box(clutter.Actor, clutter.Container):
+class Box(PreferredSizeCache, AllocationCache, PaintCulling, clutter.Actor, clutter.Container):
     __gtype_name__ = 'Box'
     '''
     A stacking box container.
@@ -41,6 +42,13 @@ class Box(clutter.Actor, clutter.Container):
         self._padding = common.Padding(padding)
         self._spacing = common.Spacing(spacing)
         self.elements = list()
+        # elements removed from the box but still in _elements, id -> element
+        # (keeping the element keeps its id unique until the list is compacted)
+        self._removed_elements = dict()
+        # name -> list of elements with this name (in insertion order)
+        self._elements_by_name = dict()
+        # actor -> element
+        self._elements_by_object = dict()
         self.background = None
         self.overlay = None
         self._overlay_displayed = False
@@ -54,6 +62,24 @@ class Box(clutter.Actor, clutter.Container):
         else:
             self.bg_ignore_allocation_box = False
     
+    def _get_elements(self):
+        # removals are applied in one pass when the elements are next read
+        if self._removed_elements:
+            removed = self._removed_elements
+            self._elements = [element for element in self._elements if id(element) not in removed]
+            self._removed_elements = dict()
+        return self._elements
+    
+    def _set_elements(self, elements):
+        self._elements = elements
+        self._removed_elements = dict()
+    
+    elements = property(_get_elements, _set_elements)
+    
+    def _discard_element(self, element):
+        self._removed_elements[id(element)] = element
+        self._unindex_element(element)
+    
     def get_children(self):
         children = list()
         for element in self.elements:
@@ -61,10 +87,36 @@ class Box(clutter.Actor, clutter.Container):
         return children
     
     def get_by_name(self, name):
+        named = self._elements_by_name.get(name)
+        if not named:
+            return None
+        if len(named) == 1:
+            return named[0]
+        # several elements share this name, return the first one in the box
         for element in self.elements:
             if element['name'] == name:
                 return element
         return None
+    
+    def _index_element(self, element):
+        self._elements_by_name.setdefault(element['name'], list()).append(element)
+        self._elements_by_object[element['object']] = element
+    
+    def _unindex_element(self, element):
+        named = self._elements_by_name.get(element['name'])
+        if named:
+            for i, other in enumerate(named):
+                if other is element:
+                    del named[i]
+                    break
+            if not named:
+                del self._elements_by_name[element['name']]
+        if self._elements_by_object.get(element['object']) is element:
+            del self._elements_by_object[element['object']]
+    
+    def _reset_index(self):
+        self._elements_by_name = dict()
+        self._elements_by_object = dict()
 
     def get_object_by_name(self, name):
         element = self.get_by_name(name)
@@ -74,6 +126,7 @@ class Box(clutter.Actor, clutter.Container):
     
     def set_horizontal(self, boolean):
         self._horizontal = boolean
+        self.queue_relayout()
     
     def set_background(self, background):
         self.background = background
@@ -117,6 +170,7 @@ class Box(clutter.Actor, clutter.Container):
             if 'name' not in new_ele or 'object' not in new_ele:
                 raise KeyError('Cannot add element to box. Element to add must be a dict with at least "name" and "object" in his keys')
             self.elements.append(new_ele)
+            self._index_element(new_ele)
             if self._overlay_displayed:
                 new_ele['object'].hide()
             new_ele['object'].set_parent(self)
@@ -132,6 +186,7 @@ class Box(clutter.Actor, clutter.Container):
             if index < 0:
                 index += len(self.elements)
             self.elements.insert(index, element)
+        self._index_element(element)
         if self._overlay_displayed:
             obj.hide()
         obj.set_parent(self)
@@ -145,16 +200,17 @@ class Box(clutter.Actor, clutter.Container):
             if self.overlay == child:
                 child.unparent()
                 self.overlay = None
-            for element in list(self.elements):
-                if element['object'] == child:
-                    child.unparent()
-                    self.elements.remove(element)
+            element = self._elements_by_object.get(child)
+            if element is not None:
+                child.unparent()
+                self._discard_element(element)
+                self.queue_relayout()
     
     def remove_element(self, name):
         element = self.get_by_name(name)
         if element:
             element['object'].unparent()
-            self.elements.remove(element)
+            self._discard_element(element)
             self.queue_relayout()
             return element['object']
     
@@ -162,12 +218,15 @@ class Box(clutter.Actor, clutter.Container):
         for element in self.elements:
             element['object'].unparent()
         self.elements = list()
+        self._reset_index()
+        self.queue_relayout()
     
     def clear(self):
         for element in self.elements:
             element['object'].unparent()
             element['object'].destroy()
         self.elements = list()
+        self._reset_index()
         if self.background:
             self.background.unparent()
             self.background.destroy()
@@ -180,15 +239,35 @@ class Box(clutter.Actor, clutter.Container):
     def get_elements(self):
         return self.elements
     
-    def do_get_preferred_width(self, for_height):
+    def _measure_elements(self):
+        '''
+        Measures every element once. Returns a scratch list with, for each
+        element, [element, preferred width, preferred height, resizable]
+        where resizable is bounded between 0 and 1 (0 if not resizable).
+        The layout is solved from this list, elements are not modified.
+        '''
+        measures = list()
+        for element in self.elements:
+            obj_width, obj_height = element['object'].get_preferred_size()[2:]
+            resizable = element.get('resizable', 0)
+            if resizable > 1:
+                resizable = 1
+            elif resizable < 0:
+                resizable = 0
+            measures.append([element, obj_width, obj_height, resizable])
+        return measures
+    
+    do_get_preferred_width = PreferredSizeCache.do_get_preferred_width
+    do_get_preferred_height = PreferredSizeCache.do_get_preferred_height
+
+    def _compute_preferred_width(self, for_height):
         inner_height = for_height - 2*self._margin.y - 2*self._padding.y
         preferred_width = 0
+        measures = self._measure_elements()
         if self._horizontal:
-            for element in self.elements:
-                obj_width = element['object'].get_preferred_size()[2]
+            for element, obj_width, obj_height, resizable in measures:
                 used_width = obj_width
                 if element.get('keep_ratio') and obj_width != 0 and element.get('expand') and for_height != -1:
-                    obj_height = element['object'].get_preferred_size()[3]
                     ratio = float(obj_width) / float(obj_height)
                     used_width = int(inner_height * ratio)
                 preferred_width += used_width + self._spacing.x
@@ -197,49 +276,33 @@ class Box(clutter.Actor, clutter.Container):
                 preferred_width -= self._spacing.x
         else:
             #find size available for special elements with expand and keep_ratio
-            special_elements = list()
+            #and for resizable elements
+            has_special_elements = False
             special_height = inner_height
-            for element in self.elements:
+            resizable_height = inner_height
+            for element, obj_width, obj_height, resizable in measures:
                 #take preferred size for resizable elements in preferred size calcul
-                if element.get('resizable', 0) != 0:
-                    pass
-                else:
+                if element.get('resizable', 0) == 0:
+                    resizable_height -= obj_height
                     if element.get('expand') and element.get('keep_ratio'):
-                        special_elements.append(element)
+                        has_special_elements = True
                     else:
-                        special_height -= element['object'].get_preferred_size()[3]
+                        special_height -= obj_height
                 special_height -= self._spacing.y
-            special_height += self._spacing.y
-            
-            #find size available for resizable elements
-            resizable_elements = list()
-            resizable_height = inner_height
-            for element in self.elements:
-                if element.get('resizable', 0) != 0:
-                    if element['resizable'] > 1:
-                        element['resizable'] = 1
-                    elif element['resizable'] < 0:
-                        element['resizable'] = 0
-                    resizable_elements.append(element)
-                else:
-                    resizable_height -= element['object'].get_preferred_size()[3]
                 resizable_height -= self._spacing.y
+            special_height += self._spacing.y
             if resizable_height != inner_height:
                 resizable_height += self._spacing.y
-                if special_elements:
+                if has_special_elements:
                     resizable_height -= special_height
             
             #find maximum object width
-            for element in self.elements:
-                obj_width = element['object'].get_preferred_size()[2]
+            for element, obj_width, obj_height, resizable in measures:
                 used_width = obj_width
-                if element.get('resizable', 0) != 0:
-                    original_height = element['object'].get_preferred_size()[3]
-                    if element.get('keep_ratio') and original_height != 0 and for_height != -1:
-                        obj_height = element['resizable'] * resizable_height
-                        factor = float(obj_height)/float(original_height)
+                if resizable != 0:
+                    if element.get('keep_ratio') and obj_height != 0 and for_height != -1:
+                        factor = float(resizable * resizable_height)/float(obj_height)
                         used_width = int(obj_width*factor)
-                obj_height = element['object'].get_preferred_size()[3]
                 if element.get('expand') and element.get('keep_ratio') and obj_width != 0 and obj_height != 0:
                     ratio = float(obj_width) / float(obj_height)
                     used_width = int(special_height * ratio)
@@ -248,66 +311,48 @@ class Box(clutter.Actor, clutter.Container):
         preferred_width += 2*self._margin.x + 2*self._padding.x
         return preferred_width, preferred_width
     
-    def do_get_preferred_height(self, for_width):
+    def _compute_preferred_height(self, for_width):
         inner_width = for_width - 2*self._margin.x - 2*self._padding.x
         preferred_height = 0
+        measures = self._measure_elements()
         if self._horizontal:
             #find size available for special elements with expand and keep_ratio
-            special_elements = list()
+            #and for resizable elements
+            has_special_elements = False
             special_width = inner_width
-            for element in self.elements:
+            resizable_width = inner_width
+            for element, obj_width, obj_height, resizable in measures:
                 #take preferred size for resizable elements in preferred size calcul
-                if element.get('resizable', 0) != 0:
-                    pass
-                else:
+                if element.get('resizable', 0) == 0:
+                    resizable_width -= obj_width
                     if element.get('expand') and element.get('keep_ratio'):
-                        special_elements.append(element)
+                        has_special_elements = True
                     else:
-                        special_width -= element['object'].get_preferred_size()[2]
+                        special_width -= obj_width
                 special_width -= self._spacing.x
-            special_width += self._spacing.x
-            
-            #find size available for resizable elements
-            resizable_elements = list()
-            resizable_width = inner_width
-            for element in self.elements:
-                if element.get('resizable', 0) != 0:
-                    if element['resizable'] > 1:
-                        element['resizable'] = 1
-                    elif element['resizable'] < 0:
-                        element['resizable'] = 0
-                    resizable_elements.append(element)
-                else:
-                    resizable_width -= element['object'].get_preferred_size()[2]
                 resizable_width -= self._spacing.x
+            special_width += self._spacing.x
             if resizable_width != inner_width:
                 resizable_width += self._spacing.x
-                if special_elements:
+                if has_special_elements:
                     resizable_width -= special_width
             
             #find maximum object height
-            for element in self.elements:
-                obj_height = element['object'].get_preferred_size()[3]
+            for element, obj_width, obj_height, resizable in measures:
                 used_height = obj_height
-                if element.get('resizable', 0) != 0:
-                    original_width = element['object'].get_preferred_size()[2]
-                    if element.get('keep_ratio') and original_width != 0 and for_width != -1:
-                        obj_width = element['resizable'] * resizable_width
-                        factor = float(obj_width) / float(original_width)
+                if resizable != 0:
+                    if element.get('keep_ratio') and obj_width != 0 and for_width != -1:
+                        factor = float(resizable * resizable_width) / float(obj_width)
                         used_height = int(obj_height*factor)
                 preferred_height = max(preferred_height, used_height)
-                obj_width = element['object'].get_preferred_size()[3]
                 if element.get('expand') and element.get('keep_ratio') and obj_width != 0 and obj_height != 0:
                     ratio = float(obj_width) / float(obj_height)
                     used_height = int(special_width / ratio)
                 preferred_height = max(preferred_height, used_height)
         else:
-            preferred_height = 0
-            for element in self.elements:
-                obj_height = element['object'].get_preferred_size()[3]
+            for element, obj_width, obj_height, resizable in measures:
                 used_height = obj_height
                 if element.get('keep_ratio') and obj_height != 0 and element.get('expand') and for_width != -1:
-                    obj_width = element['object'].get_preferred_size()[2]
                     ratio = float(obj_width) / float(obj_height)
                     used_height = int(inner_width / ratio)
                 preferred_height += used_height + self._spacing.y
@@ -319,35 +364,47 @@ class Box(clutter.Actor, clutter.Container):
         return preferred_height, preferred_height
     
     def do_allocate(self, box, flags):
+        children = [self.background, self.overlay]
+        children.extend(element['object'] for element in self.elements)
+        if self._allocation_unchanged(box, flags, children):
+            clutter.Actor.do_allocate(self, box, flags)
+            return
         main_width = box.x2 - box.x1
         main_height = box.y2 - box.y1
         inner_width = main_width - 2*self._margin.x - 2*self._padding.x
         inner_height = main_height - 2*self._margin.y - 2*self._padding.y
+        measures = self._measure_elements()
         
         #find size available for special elements with expand and keep_ratio, ignoring elements with resizable
-        special_elements = list()
+        #and size available for resizable elements
+        special_measures = list()
         special_width = inner_width
         special_height = inner_height
-        needed_width = 0
-        needed_height = 0
-        for element in self.elements:
-            if element.get('resizable', 0) != 0:
-                pass
-            else:
+        resizable_width = inner_width
+        resizable_height = inner_height
+        for measure in measures:
+            element, obj_width, obj_height, resizable = measure
+            if element.get('resizable', 0) == 0:
                 if element.get('expand') and element.get('keep_ratio'):
-                    special_elements.append(element)
+                    special_measures.append(measure)
                 else:
-                    special_width -= element['object'].get_preferred_size()[2]
-                    special_height -= element['object'].get_preferred_size()[3]
+                    special_width -= obj_width
+                    special_height -= obj_height
+                    resizable_width -= obj_width
+                    resizable_height -= obj_height
             special_width -= self._spacing.x
             special_height -= self._spacing.y
+            resizable_width -= self._spacing.x
+            resizable_height -= self._spacing.y
         special_width += self._spacing.x
         special_height += self._spacing.y
+        resizable_width += self._spacing.x
+        resizable_height += self._spacing.y
         
         #check if some place will remain for resizable elements
-        for element in special_elements:
-            original_width = element['object'].get_preferred_size()[2]
-            original_height = element['object'].get_preferred_size()[3]
+        needed_width = 0
+        needed_height = 0
+        for element, original_width, original_height, resizable in special_measures:
             if self._horizontal:
                 obj_width = original_width
                 obj_height = inner_height
@@ -378,61 +435,38 @@ class Box(clutter.Actor, clutter.Container):
                 needed_height += obj_height
         special_width = needed_width
         special_height = needed_height
-        
-        #find size available for resizable elements
-        resizable_elements = list()
-        resizable_width = inner_width
-        resizable_height = inner_height
-        for element in self.elements:
-            if element.get('resizable', 0) != 0:
-                if element['resizable'] > 1:
-                    element['resizable'] = 1
-                elif element['resizable'] < 0:
-                    element['resizable'] = 0
-                resizable_elements.append(element)
-            else:
-                if element.get('expand') and element.get('keep_ratio'):
-                    pass
-                else:
-                    resizable_width -= element['object'].get_preferred_size()[2]
-                    resizable_height -= element['object'].get_preferred_size()[3]
-            resizable_width -= self._spacing.x
-            resizable_height -= self._spacing.y
-        resizable_width += self._spacing.x
-        resizable_height += self._spacing.y
-        if special_elements:
+        if special_measures:
             resizable_width -= special_width
             resizable_height -= special_height
         
-        #find resizable elements who will bypass box size
-        for element in self.elements:
-            if element.get('resizable', 0) != 0:
-                original_width, original_height = element['object'].get_preferred_size()[2:]
+        #find resizable elements who will bypass box size (their resizable value is reduced for this layout)
+        for measure in measures:
+            element, original_width, original_height, resizable = measure
+            if resizable != 0 and element.get('keep_ratio'):
                 if self._horizontal:
-                    if element.get('keep_ratio') and original_width != 0:
-                        obj_width = element['resizable'] * resizable_width
+                    if original_width != 0:
+                        obj_width = resizable * resizable_width
                         ratio = float(obj_width/original_width)
                         obj_height = int(original_height*ratio)
                         if obj_height > inner_height:
                             # reduce resizable property
                             ratio = float(inner_height/original_height)
                             obj_width = int(original_width*ratio)
-                            element['resizable'] = float(obj_width/resizable_width)
+                            measure[3] = float(obj_width/resizable_width)
                 else:
-                    if element.get('keep_ratio') and original_height != 0:
-                        obj_height = element['resizable'] * resizable_height
+                    if original_height != 0:
+                        obj_height = resizable * resizable_height
                         ratio = float(obj_height/original_height)
                         obj_width = int(original_width*ratio)
                         if obj_width > inner_width:
                             # reduce resizable property
                             ratio = float(inner_width/original_width)
                             obj_height = int(original_height*ratio)
-                            element['resizable'] = float(obj_height/resizable_height)
+                            measure[3] = float(obj_height/resizable_height)
         
         x = self._margin.x + self._padding.x
         y = self._margin.y + self._padding.y
-        for element in self.elements:
-            obj_width, obj_height = element['object'].get_preferred_size()[2:]
+        for element, obj_width, obj_height, resizable in measures:
             if element.get('expand'):
                 original_height = obj_height
                 original_width = obj_width
@@ -460,16 +494,16 @@ class Box(clutter.Actor, clutter.Container):
                             obj_width = int(float(obj_height) * ratio)
                         else:
                             special_height -= obj_height
-            if element in resizable_elements:
+            if element.get('resizable', 0) != 0:
                 if self._horizontal:
                     original_width = obj_width
-                    obj_width = element['resizable'] * resizable_width
+                    obj_width = resizable * resizable_width
                     if element.get('keep_ratio') and original_width != 0:
                         ratio = float(obj_width/original_width)
                         obj_height = int(obj_height*ratio)
                 else:
                     original_height = obj_height
-                    obj_height = element['resizable'] * resizable_height
+                    obj_height = resizable * resizable_height
                     if element.get('keep_ratio') and original_height != 0:
                         ratio = float(obj_height/original_height)
                         obj_width = int(obj_width*ratio)
@@ -547,7 +581,7 @@ class Box(clutter.Actor, clutter.Container):
     
     def set_bg_ignore_allocation_box(self, state):
         self.bg_ignore_allocation_box = state
-        self.queue_redraw()
+        self.queue_relayout()
     
     def do_foreach(self, func, data=None):
         if self.background:
@@ -562,9 +596,12 @@ class Box(clutter.Actor, clutter.Container):
             self.background.paint()
         if self.overlay:
             self.overlay.paint()
+        area = self._get_paint_area()
         draw_last_objects = list()
         current_value = 0
         for element in self.elements:
+            if area is not None and not common.is_in_area(element['object'], area):
+                continue
             draw_last = element.get('draw_last')
             if draw_last:
                 if isinstance(draw_last, bool):
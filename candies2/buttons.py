@@ -6,6 +6,7 @@ import clutter
 from text import TextContainer
 from roundrect import RoundRectangle, OutlinedRoundRectangle
 from clutter import cogl
+from texturecache import set_texture_from_file
 
 class ClassicButton(TextContainer):
     __gtype_name__ = 'ClassicButton'
@@ -30,7 +31,7 @@ class ImageButton(ClassicButton):
         
         self.image = clutter.Texture()
         if image_src:
-            self.image.set_from_file(image_src)
+            set_texture_from_file(self.image, image_src)
         self.image.set_parent(self)
         
         self.set_font_name('16')
@@ -39,7 +40,7 @@ class ImageButton(ClassicButton):
         self.set_border_color('#888888ff')
     
     def set_image_src(self, image_src):
-        self.image.set_from_file(image_src)
+        set_texture_from_file(self.image, image_src)
     
     def do_allocate(self, box, flags):
         btn_width = box.x2 - box.x1
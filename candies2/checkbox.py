@@ -4,6 +4,7 @@
 import clutter
 from text import TextContainer
 from container import BaseContainer
+from texturecache import set_texture_from_file
 
 
 class CheckButton(clutter.Texture):
@@ -20,11 +21,11 @@ class CheckButton(clutter.Texture):
         if checked:
             self.checked = True
             if self.checked_image_path:
-                self.set_from_file(self.checked_image_path)
+                set_texture_from_file(self, self.checked_image_path)
         else:
             self.checked = False
             if self.not_checked_image_path:
-                self.set_from_file(self.not_checked_image_path)
+                set_texture_from_file(self, self.not_checked_image_path)
         self.callback = callback
         self.user_data = user_data
         self.set_reactive(True)
@@ -36,10 +37,10 @@ class CheckButton(clutter.Texture):
     def toggle_check(self, silent=False):
         if self.checked:
             self.checked = False
-            self.set_from_file(self.not_checked_image_path)
+            set_texture_from_file(self, self.not_checked_image_path)
         else:
             self.checked = True
-            self.set_from_file(self.checked_image_path)
+            set_texture_from_file(self, self.checked_image_path)
         if not silent:
             self._action()
 
@@ -69,10 +70,10 @@ class CheckButton(clutter.Texture):
     def refresh_image(self):
         if self.checked:
             if self.checked_image_path:
-                self.set_from_file(self.checked_image_path)
+                set_texture_from_file(self, self.checked_image_path)
         else:
             if self.not_checked_image_path:
-                self.set_from_file(self.not_checked_image_path)
+                set_texture_from_file(self, self.not_checked_image_path)
 
 
 class CheckBox(BaseContainer):
@@ -83,7 +84,6 @@ class CheckBox(BaseContainer):
     
     def __init__(self, label='Checkbox', checked=False, callback=None, spacing=16, size=64, image_placement='left', user_data=None):
         BaseContainer.__init__(self, pick_enabled=False)
-        self._children = list()
         self.checked = checked
         self.callback = callback
         self.user_data = user_data
@@ -150,10 +150,10 @@ class CheckBox(BaseContainer):
     def refresh_image(self):
         if self.checked:
             if self._checked_image_path:
-                self._image.set_from_file(self._checked_image_path)
+                set_texture_from_file(self._image, self._checked_image_path)
         else:
             if self._not_checked_image_path:
-                self._image.set_from_file(self._not_checked_image_path)
+                set_texture_from_file(self._image, self._not_checked_image_path)
     
     def set_checked_image_path(self, path):
         self._checked_image_path = path
@@ -4,6 +4,17 @@
 import gobject
 import clutter
 from clutter import cogl
+from roundrect import PathCache
+
+
+# paths are shared by circles of the same size and stroke width
+CIRCLE_PATHS = PathCache(max_size=64)
+
+def _build_circle_path(width, height, stroke_width):
+    cogl.path_arc(width / 2, height / 2, width / 2, height / 2, 0, 360)
+    cogl.path_close()
+    cogl.path_arc(width / 2, height / 2, (width / 2) - stroke_width, (height / 2) - stroke_width, 0, 360)
+    cogl.path_close()
 
 class Circle(clutter.Actor):
     """
@@ -40,11 +51,8 @@ class Circle(clutter.Actor):
             raise TypeError('Unknown property ' + pspec.name)
 
     def __paint_circle(self, width, height, color):
-        cogl.path_arc(width / 2, height / 2, width / 2, height / 2, 0, 360)
-        cogl.path_close()
-        cogl.path_arc(width / 2, height / 2, (width / 2) - self._stroke_width, (height / 2) - self._stroke_width, 0, 360)
-        cogl.path_close()
-
+        key = (width, height, self._stroke_width)
+        CIRCLE_PATHS.set_current_path(key, _build_circle_path, *key)
         cogl.set_source_color(color)
         cogl.path_fill()
 
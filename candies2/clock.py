@@ -4,6 +4,38 @@
 import clutter
 from clutter import cogl
 import math
+from roundrect import PathCache
+
+
+# hands paths are shared by clocks of the same size showing the same time
+CLOCK_PATHS = PathCache(max_size=128)
+
+def _build_hand_path(width, height, angle, spread, base_ratio, length_ratio):
+    """
+    Builds the path of a hand pointing at angle degrees (0 is 12 o'clock),
+    its base is spread degrees around angle at 1/base_ratio of the radius
+    and its tip at 1/length_ratio of the radius.
+    """
+    hw = width / 2
+    hh = height / 2
+    
+    center_x = hw
+    center_y = hh
+    
+    angle = angle + 270
+    left = angle - spread
+    right = angle + spread
+    
+    angle = angle * (math.pi / 180)
+    left = left * (math.pi / 180)
+    right = right * (math.pi / 180)
+    
+    cogl.path_move_to(center_x, center_y)
+    cogl.path_line_to(center_x + (hw/base_ratio) * math.cos(left), center_y + (hh/base_ratio) * math.sin(left))
+    cogl.path_line_to(center_x + (hw/length_ratio) * math.cos(angle), center_y + (hh/length_ratio) * math.sin(angle))
+    cogl.path_line_to(center_x + (hw/base_ratio) * math.cos(right), center_y + (hh/base_ratio) * math.sin(right))
+    cogl.path_line_to(center_x, center_y)
+    cogl.path_close()
 
 
 class Clock(clutter.Actor):
@@ -37,18 +69,11 @@ class Clock(clutter.Actor):
         (x1, y1, x2, y2) = self.get_allocation_box()
         width = x2 - x1
         height = y2 - y1
-        hw = width / 2
-        hh = height / 2
-        
-        center_x = hw
-        center_y = hh
         
         # texture
         if self._texture is not None:
-            cogl.path_rectangle(0, 0, width, height)
-            cogl.path_close()
             cogl.set_source_texture(self._texture)
-            cogl.path_fill()
+            cogl.rectangle(0, 0, width, height)
         
         # clock hands
         if self._date is not None:
@@ -56,38 +81,14 @@ class Clock(clutter.Actor):
             minute = self._date.minute
             
             # hour
-            angle = (60 * hour + minute) / 2 + 270
-            left = angle - 14
-            right = angle + 14
-            
-            angle = angle * (math.pi / 180)
-            left = left * (math.pi / 180)
-            right = right * (math.pi / 180)
-            
-            cogl.path_move_to(center_x, center_y)
-            cogl.path_line_to(center_x + (hw/4) * math.cos(left), center_y + (hh/4) * math.sin(left))
-            cogl.path_line_to(center_x + (2*hw/3) * math.cos(angle), center_y + (2*hh/3) * math.sin(angle))
-            cogl.path_line_to(center_x + (hw/4) * math.cos(right), center_y + (hh/4) * math.sin(right))
-            cogl.path_line_to(center_x, center_y)
-            cogl.path_close()
+            key = ('hour', width, height, hour, minute)
+            CLOCK_PATHS.set_current_path(key, _build_hand_path, width, height, (60 * hour + minute) / 2, 14, 4, 1.5)
             cogl.set_source_color(self._color)
             cogl.path_fill()
             
             # minute
-            angle = 6 * minute + 270
-            left = angle - 10
-            right = angle + 10
-            
-            angle = angle * (math.pi / 180)
-            left = left * (math.pi / 180)
-            right = right * (math.pi / 180)
-            
-            cogl.path_move_to(center_x, center_y)
-            cogl.path_line_to(center_x + (hw/3) * math.cos(left), center_y + (hh/3) * math.sin(left))
-            cogl.path_line_to(center_x + hw * math.cos(angle), center_y + hh * math.sin(angle))
-            cogl.path_line_to(center_x + (hw/3) * math.cos(right), center_y + (hh/3) * math.sin(right))
-            cogl.path_line_to(center_x, center_y)
-            cogl.path_close()
+            key = ('minute', width, height, minute)
+            CLOCK_PATHS.set_current_path(key, _build_hand_path, width, height, 6 * minute, 10, 3, 1)
             cogl.set_source_color(self._color)
             cogl.path_fill()
 
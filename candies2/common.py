@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*
 
+import weakref
+import clutter
+
 class Margin(object):
     ATTR_NAME = 'margin'
     
@@ -52,3 +55,99 @@ class Spacing(Margin):
         Margin.__init__(self, value, xy_only=xy_only)
 
 
+# stage lookup cache: every actor met while walking up a parents chain is
+# watched with parent-set, any reparenting invalidates all cached results
+_stage_generation = [0]
+_stage_cache = weakref.WeakKeyDictionary()
+# watched actors are marked on the GObject, Python wrappers of C actors are
+# not kept alive and a new wrapper can be created for the same actor
+_STAGE_WATCHED_KEY = 'candies2-stage-watched'
+
+def _on_parent_set(actor, old_parent):
+    _stage_generation[0] += 1
+
+def _watch_parent(actor):
+    if not actor.get_data(_STAGE_WATCHED_KEY):
+        actor.connect('parent-set', _on_parent_set)
+        actor.set_data(_STAGE_WATCHED_KEY, True)
+
+def get_stage(actor):
+    """
+    Returns the stage containing an actor (or None if the actor is not on a
+    stage). The result is cached until an actor of the parents chain is
+    reparented.
+    """
+    cached = _stage_cache.get(actor)
+    if cached is not None and cached[0] == _stage_generation[0]:
+        return cached[1]
+    obj = actor
+    _watch_parent(obj)
+    parent = obj.get_parent()
+    while parent is not None:
+        obj = parent
+        _watch_parent(obj)
+        parent = obj.get_parent()
+    if isinstance(obj, clutter.Stage):
+        stage = obj
+    else:
+        stage = None
+    _stage_cache[actor] = (_stage_generation[0], stage)
+    return stage
+
+def is_on_stage(actor):
+    return get_stage(actor) is not None
+
+def get_visible_area(actor):
+    """
+    Returns the area (x1, y1, x2, y2) of an actor, in its own coordinates,
+    which is not cut by the clip of the actor, its parents or the stage.
+    Returns None when the area can not be computed: the actor is not on a
+    stage or an actor of the parents chain is rotated or scaled.
+    """
+    x1, y1, x2, y2 = None, None, None, None
+    offset_x, offset_y = 0, 0
+    obj = actor
+    while True:
+        if obj.is_rotated() or obj.is_scaled():
+            return None
+        if isinstance(obj, clutter.Stage):
+            width, height = obj.get_size()
+            clip = (0, 0, width, height)
+        elif obj.has_clip():
+            clip = obj.get_clip()
+        else:
+            clip = None
+        if clip is not None:
+            clip_x, clip_y, clip_width, clip_height = clip
+            clip_x -= offset_x
+            clip_y -= offset_y
+            if x1 is None:
+                x1, y1, x2, y2 = clip_x, clip_y, clip_x + clip_width, clip_y + clip_height
+            else:
+                x1 = max(x1, clip_x)
+                y1 = max(y1, clip_y)
+                x2 = min(x2, clip_x + clip_width)
+                y2 = min(y2, clip_y + clip_height)
+        if isinstance(obj, clutter.Stage):
+            return x1, y1, x2, y2
+        parent = obj.get_parent()
+        if parent is None:
+            return None
+        box = obj.get_allocation_box()
+        anchor_x, anchor_y = obj.get_anchor_point()
+        offset_x += box.x1 - anchor_x
+        offset_y += box.y1 - anchor_y
+        obj = parent
+
+def is_in_area(actor, area):
+    """
+    Tells if the allocation of an actor intersects an area given in its
+    parent coordinates. Rotated or scaled actors are always considered in.
+    """
+    if actor.is_rotated() or actor.is_scaled():
+        return True
+    box = actor.get_allocation_box()
+    anchor_x, anchor_y = actor.get_anchor_point()
+    x1 = box.x1 - anchor_x
+    y1 = box.y1 - anchor_y
+    return x1 < area[2] and y1 < area[3] and x1 + box.x2 - box.x1 > area[0] and y1 + box.y2 - box.y1 > area[1]
@@ -2,30 +2,248 @@
 # -*- coding: utf-8 -*
 
 import clutter
+import common
 
 
-class BaseContainer(clutter.Actor, clutter.Container):
+class PreferredSizeCache(object):
+    """
+    A mixin memoizing preferred sizes of an actor.
+
+    The mixin must be placed before clutter.Actor in the class bases, and the
+    class must implement _compute_preferred_width and
+    _compute_preferred_height instead of the do_get_preferred_* methods.
+    As virtual methods are only looked up in the class own dictionary when
+    the GType is registered, the class must also bind them explicitly:
+
+        do_get_preferred_width = PreferredSizeCache.do_get_preferred_width
+        do_get_preferred_height = PreferredSizeCache.do_get_preferred_height
+
+    Results are kept per for_height/for_width until the actor queues a
+    relayout (the cache is disabled with clutter versions which do not
+    have the queue-relayout signal).
+
+    Hits and misses are counted per actor (get_preferred_size_cache_stats)
+    and for all actors (PreferredSizeCache.stats).
+    """
+    MAX_CACHED_SIZES = 8
+    stats = dict(hits=0, misses=0)
+
+    def _get_preferred_size_cache(self):
+        try:
+            return self.__cache
+        except AttributeError:
+            self.__hits = 0
+            self.__misses = 0
+            try:
+                self.connect('queue-relayout', self._on_queue_relayout_clear_cache)
+            except TypeError:
+                self.__cache = None
+            else:
+                self.__cache = (dict(), dict())
+            return self.__cache
+
+    def _on_queue_relayout_clear_cache(self, actor):
+        self.clear_preferred_size_cache()
+
+    def clear_preferred_size_cache(self):
+        cache = self._get_preferred_size_cache()
+        if cache is not None:
+            cache[0].clear()
+            cache[1].clear()
+
+    def get_preferred_size_cache_stats(self):
+        self._get_preferred_size_cache()
+        return self.__hits, self.__misses
+
+    @classmethod
+    def reset_preferred_size_cache_stats(cls):
+        PreferredSizeCache.stats['hits'] = 0
+        PreferredSizeCache.stats['misses'] = 0
+
+    def __get_cached(self, sizes, for_size, compute):
+        try:
+            result = sizes[for_size]
+        except KeyError:
+            self.__misses += 1
+            PreferredSizeCache.stats['misses'] += 1
+            result = compute(for_size)
+            if len(sizes) >= self.MAX_CACHED_SIZES:
+                sizes.clear()
+            sizes[for_size] = result
+        else:
+            self.__hits += 1
+            PreferredSizeCache.stats['hits'] += 1
+        return result
+
+    def do_get_preferred_width(self, for_height=-1):
+        cache = self._get_preferred_size_cache()
+        if cache is None:
+            return self._compute_preferred_width(for_height)
+        return self.__get_cached(cache[0], for_height, self._compute_preferred_width)
+
+    def do_get_preferred_height(self, for_width=-1):
+        cache = self._get_preferred_size_cache()
+        if cache is None:
+            return self._compute_preferred_height(for_width)
+        return self.__get_cached(cache[1], for_width, self._compute_preferred_height)
+
+
+# not defined by old clutter versions
+ABSOLUTE_ORIGIN_CHANGED = getattr(clutter, 'ABSOLUTE_ORIGIN_CHANGED', 0)
+
+
+class AllocationCache(object):
+    """
+    A mixin skipping children layout when only the actor origin moved.
+
+    do_allocate must call _allocation_unchanged(box, flags, children) first
+    and only chain up to clutter.Actor.do_allocate when it returns True.
+    The layout is kept while the allocation size and flags are the same and
+    the actor did not queue a relayout (which also happens when a child
+    queues a relayout, is shown, hidden, added or removed). When the
+    absolute origin changed, children are reallocated with their current
+    boxes so they are notified without computing the layout again.
+    """
+
+    def _get_allocation_generation(self):
+        try:
+            return self.__generation
+        except AttributeError:
+            self.__last_allocation = None
+            try:
+                self.connect('queue-relayout', self._on_queue_relayout_invalidate_allocation)
+            except TypeError:
+                self.__generation = None
+            else:
+                self.__generation = 0
+            return self.__generation
+
+    def _on_queue_relayout_invalidate_allocation(self, actor):
+        self.__generation += 1
+
+    def invalidate_allocation(self):
+        self._get_allocation_generation()
+        self.__last_allocation = None
+
+    def _allocation_unchanged(self, box, flags, children=()):
+        generation = self._get_allocation_generation()
+        if generation is None:
+            return False
+        allocation = (box.x2 - box.x1, box.y2 - box.y1, flags & ~ABSOLUTE_ORIGIN_CHANGED, generation)
+        if allocation != self.__last_allocation:
+            self.__last_allocation = allocation
+            return False
+        if flags & ABSOLUTE_ORIGIN_CHANGED:
+            for child in children:
+                if child is not None:
+                    child.allocate(child.get_allocation_box(), flags)
+        return True
+
+
+class PaintCulling(object):
+    """
+    A mixin skipping paint (and pick) of children outside the visible area.
+
+    Culling is disabled by default, it is enabled with set_culling(True).
+    A child is skipped when its allocation does not intersect the area left
+    by the clips of the container, of its parents and the stage, so it must
+    be disabled for children painting outside of their allocation.
+    """
+    _culling = False
+
+    def set_culling(self, boolean):
+        self._culling = bool(boolean)
+        self.queue_redraw()
+
+    def is_culling(self):
+        return self._culling
+
+    def _get_paint_area(self):
+        # returns None when all children must be painted
+        if self._culling:
+            return common.get_visible_area(self)
+        return None
+
+    def _paint_children(self, children):
+        area = self._get_paint_area()
+        if area is None:
+            for child in children:
+                child.paint()
+        else:
+            for child in children:
+                if common.is_in_area(child, area):
+                    child.paint()
+
+
+class BaseContainer(PaintCulling, clutter.Actor, clutter.Container):
     """A container class wich implements all standard container functions."""
 
     __gtype_name__ = 'BaseContainer'
 
     def __init__(self, allow_add=False, allow_remove=False, pick_enabled=True):
         clutter.Actor.__init__(self)
+        # ordered children, with a set for membership tests and a lazily
+        # built child -> index dictionary (see _child_index)
         self._children = list()
+        self._children_set = set()
+        self._children_indexes = None
         self.__allow_add = allow_add
         self.__allow_remove = allow_remove
         self.__pick_enabled = pick_enabled
 
     def has_child(self, obj):
-        return obj in self._children
+        return obj in self._children_set
+
+    def is_pick_enabled(self):
+        return self.__pick_enabled
+
+    def _child_index(self, child):
+        if self._children_indexes is None:
+            self._children_indexes = dict((c, i) for i, c in enumerate(self._children))
+        try:
+            return self._children_indexes[child]
+        except (KeyError, TypeError):
+            raise ValueError('Actor %s is not a child of %s' % (child, self))
+
+    def _append_child(self, child):
+        self._children.append(child)
+        self._children_set.add(child)
+        if self._children_indexes is not None:
+            self._children_indexes[child] = len(self._children) - 1
+
+    def _insert_child(self, index, child):
+        if index >= len(self._children):
+            self._append_child(child)
+        else:
+            self._children.insert(index, child)
+            self._children_set.add(child)
+            self._children_indexes = None
+
+    def _remove_child(self, child):
+        index = self._child_index(child)
+        del self._children[index]
+        self._children_set.discard(child)
+        if index == len(self._children):
+            del self._children_indexes[child]
+        else:
+            self._children_indexes = None
+        return index
+
+    def _clear_children(self):
+        self._children = list()
+        self._children_set = set()
+        self._children_indexes = None
+
+    def _children_reordered(self):
+        self._children_indexes = None
 
     def do_add(self, *children):
         if self.__allow_add:
             for child in children:
-                if child in self._children:
+                if child in self._children_set:
                     raise Exception('Actor %s is already a children of %s' % (child, self))
                 child.set_parent(self)
-                self._children.append(child)
+                self._append_child(child)
                 self.queue_relayout()
         else:
             raise Exception('adding actor to %s is not authorized' % self)
@@ -33,8 +251,8 @@ class BaseContainer(clutter.Actor, clutter.Container):
     def do_remove(self, *children):
         if self.__allow_remove:
             for child in children:
-                if child in self._children:
-                    self._children.remove(child)
+                if child in self._children_set:
+                    self._remove_child(child)
                     child.unparent()
                     self.queue_relayout()
                 else:
@@ -43,13 +261,13 @@ class BaseContainer(clutter.Actor, clutter.Container):
             raise Exception('removing actor to %s is not authorized' % self)
 
     def _add(self, child):
-        if child not in self._children:
+        if child not in self._children_set:
             child.set_parent(self)
-            self._children.append(child)
+            self._append_child(child)
 
     def _remove(self, child):
-        if child in self._children:
-            self._children.remove(child)
+        if child in self._children_set:
+            self._remove_child(child)
             child.unparent()
 
     def do_foreach(self, func, data=None):
@@ -57,13 +275,11 @@ class BaseContainer(clutter.Actor, clutter.Container):
             func(child, data)
 
     def do_paint(self):
-        for actor in self._children:
-            actor.paint()
+        self._paint_children(self._children)
 
     def do_pick(self, color):
         if self.__pick_enabled:
-            for actor in self._children:
-                actor.paint()
+            self._paint_children(self._children)
         else:
             clutter.Actor.do_pick(self, color)
 
@@ -87,17 +303,7 @@ class BaseContainer(clutter.Actor, clutter.Container):
                 stage.set_key_focus(self._old_key_focus)
 
     def get_stage(self):
-        obj = self
-        if obj.get_parent():
-            has_parent = True
-            obj = obj.get_parent()
-            while has_parent:
-                if obj.get_parent():
-                    has_parent = True
-                    obj = obj.get_parent()
-                else:
-                    has_parent = False
-        if isinstance(obj, clutter.Stage):
-            return obj
-        else:
-            return None
+        return common.get_stage(self)
+
+    def is_on_stage(self):
+        return common.get_stage(self) is not None
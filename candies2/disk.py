@@ -5,6 +5,15 @@ import gobject
 import clutter
 
 from clutter import cogl
+from roundrect import PathCache
+
+
+# paths are shared by disks of the same size
+DISK_PATHS = PathCache(max_size=64)
+
+def _build_disk_path(width, height):
+    cogl.path_ellipse(width / 2, height / 2, width / 2, height / 2)
+    cogl.path_close()
 
 class Disk(clutter.Actor):
     """
@@ -37,9 +46,7 @@ class Disk(clutter.Actor):
             raise TypeError('Unknown property ' + pspec.name)
 
     def __paint_circle(self, width, height, color):
-        cogl.path_ellipse(width / 2, height / 2, width / 2, height / 2)
-        cogl.path_close()
-
+        DISK_PATHS.set_current_path((width, height), _build_disk_path, width, height)
         cogl.set_source_color(color)
         cogl.path_fill()
 
@@ -8,6 +8,7 @@ from roundrect import RoundRectangle
 from text import TextContainer
 from box import VBox
 from autoscroll import AutoScrollPanel
+from texturecache import set_texture_from_file
 
 
 class OptionLine(BaseContainer):
@@ -54,7 +55,7 @@ class OptionLine(BaseContainer):
         self._icon_allocate = True
         self.icon = clutter.Texture()
         if icon_path:
-            self.icon.set_from_file(icon_path)
+            set_texture_from_file(self.icon, icon_path)
         else:
             self.icon.hide()
         self._add(self.icon)
@@ -111,7 +112,7 @@ class OptionLine(BaseContainer):
     def set_icon(self, new_icon_path=None):
         self.icon_path = new_icon_path
         if new_icon_path:
-            self.icon.set_from_file(new_icon_path)
+            set_texture_from_file(self.icon, new_icon_path)
             self.icon.show()
         else:
             self.icon.hide()
@@ -240,7 +241,7 @@ class Select(clutter.Actor, clutter.Container):
     A select input.
     """
 
-    def __init__(self, padding=8, spacing=8, on_change_callback=None, icon_height=48, open_icon_path=None, font='14', font_color='Black', selected_font_color='Blue', color='LightGray', border_color='Gray', option_color='LightBlue', texture=None, user_data=None, direction="down", y_offsets=None, alignment="center"):
+    def __init__(self, padding=8, spacing=8, on_change_callback=None, icon_height=48, open_icon_path=None, font='14', font_color='Black', selected_font_color='Blue', color='LightGray', border_color='Gray', option_color='LightBlue', texture=None, user_data=None, direction="down", y_offsets=None, alignment="center", kinetic=False):
         clutter.Actor.__init__(self)
         self._padding = common.Padding(padding)
         self._spacing = common.Spacing(spacing)
@@ -293,7 +294,7 @@ class Select(clutter.Actor, clutter.Container):
         # list of options displayed when the select input is opened
         self._list = VBox(padding=0, spacing=0)
         # auto scroll panel
-        self._auto_scroll = AutoScrollPanel(self._list)
+        self._auto_scroll = AutoScrollPanel(self._list, kinetic=kinetic)
         self._auto_scroll.hide()
         self._auto_scroll.set_parent(self)
         # selected option is displayed when the select input is closed
@@ -320,20 +321,10 @@ class Select(clutter.Actor, clutter.Container):
         self._locked = status
 
     def get_stage(self):
-        obj = self
-        if obj.get_parent():
-            has_parent = True
-            obj = obj.get_parent()
-            while has_parent:
-                if obj.get_parent():
-                    has_parent = True
-                    obj = obj.get_parent()
-                else:
-                    has_parent = False
-        if isinstance(obj, clutter.Stage):
-            return obj
-        else:
-            return None
+        return common.get_stage(self)
+
+    def is_on_stage(self):
+        return common.get_stage(self) is not None
 
     def get_selected(self):
         return self._selected
@@ -499,6 +490,9 @@ class Select(clutter.Actor, clutter.Container):
     def set_scroller_image_path(self, path):
         self._auto_scroll.set_scroller_image_path(path)
 
+    def set_kinetic(self, kinetic):
+        self._auto_scroll.set_kinetic(kinetic)
+
     def do_get_preferred_width(self, for_height):
         preferred = max(self._selected_option.get_preferred_width(for_height)[1], self._list.get_preferred_width(for_height)[1])
         return preferred, preferred
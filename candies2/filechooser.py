@@ -19,6 +19,8 @@ from list import LightList
 from multilayer import MultiLayerContainer
 from slider import Slider
 from video import VideoPlayer
+from atlas import AtlasImage, ICONS
+from thumbnails import THUMBNAILS
 
 
 class FileEntry(BaseContainer):
@@ -31,14 +33,7 @@ class FileEntry(BaseContainer):
         BaseContainer.__init__(self, allow_add=False, allow_remove=False, pick_enabled=False)
         self._padding = common.Padding(padding)
         self._spacing = common.Spacing(spacing)
-        self.name = name
         self.selected = False
-        self._icon_src = icon_src
-        # TODO gérer les caractere latin et utf8
-        # self.text = encode_string(text)
-        self.text = text
-        self.extension = extension
-        self._is_dir = is_dir
         self.icon_size = 32
         self._bg_color = '#ffffff44'
         self._selected_bg_color = '#ffff8844'
@@ -48,9 +43,8 @@ class FileEntry(BaseContainer):
         self._bg.set_color(self._bg_color)
         self._add(self._bg)
 
-        self._icon = clutter.Texture()
-        if self._icon_src:
-            self._icon.set_from_file(self._icon_src)
+        self._icon_src = None
+        self._icon = AtlasImage()
         self._add(self._icon)
 
         self._label = clutter.Text()
@@ -59,9 +53,24 @@ class FileEntry(BaseContainer):
         self._label.set_line_wrap(False)
         self._label.set_ellipsize(2)  # let 2 words after "..."
         self._label.set_line_alignment(3)  # align text to left
-        self._label.set_text(str(self.text))
         self._add(self._label)
 
+        self.set_file(name, icon_src, text, extension, is_dir)
+
+    def set_file(self, name='', icon_src='', text='', extension='', is_dir=False):
+        # used to rebind a recycled entry to another file
+        self.name = name
+        # TODO gérer les caractere latin et utf8
+        # self.text = encode_string(text)
+        self.text = text
+        self.extension = extension
+        self._is_dir = is_dir
+        if icon_src != self._icon_src:
+            self._icon_src = icon_src
+            if icon_src:
+                self._icon.set_from_file(icon_src)
+        self._label.set_text(str(text))
+
     def set_selected(self, boolean):
         if boolean:
             self.selected = True
@@ -134,26 +143,90 @@ class FileEntry(BaseContainer):
 
 
 class PreviewDisplayer(BaseContainer):
+    '''
+    Displays an image scaled to fit its allocation. Images are loaded from
+    thumbnails bounded by the allocation size (see ThumbnailLoader), a
+    placeholder is shown until the image is uploaded. Without gtk.gdk,
+    images are decoded asynchronously at their full size by clutter.
+    '''
     __gtype_name__ = 'PreviewDisplayer'
 
+    # decoding size used before the first allocation
+    DEFAULT_SIZE = 1024
+
     def __init__(self, padding=10):
         BaseContainer.__init__(self, allow_add=False, allow_remove=False, pick_enabled=False)
         self._padding = common.Padding(padding)
+        self._request = None
+        self._inner_size = (self.DEFAULT_SIZE, self.DEFAULT_SIZE)
+
+        self._placeholder = clutter.Rectangle()
+        self._placeholder.set_color('#ffffff22')
+        self._placeholder.hide()
+        self._add(self._placeholder)
 
         self._image = clutter.Texture()
+        if not THUMBNAILS.is_available():
+            self._image.set_property('load-async', True)
+            self._image.connect('load-finished', self._on_load_finished)
         self._add(self._image)
 
+    def set_placeholder_color(self, color):
+        self._placeholder.set_color(color)
+
+    def cancel(self):
+        """Drops the image being decoded"""
+        if self._request is not None:
+            self._request.cancel()
+            self._request = None
+
     def set_from_file(self, image_src):
+        self.cancel()
+        self._image.hide()
+        self._placeholder.show()
+        if THUMBNAILS.is_available():
+            try:
+                self._request = THUMBNAILS.load(image_src, max(self._inner_size), self._on_image_loaded)
+            except Exception:
+                self._placeholder.hide()
+        else:
+            try:
+                self._image.set_from_file(image_src)
+            except Exception:
+                self._placeholder.hide()
+
+    def _on_image_loaded(self, pixbuf):
+        self._request = None
+        self._placeholder.hide()
+        if pixbuf is None:
+            return
         try:
-            self._image.set_from_file(image_src)
+            self._image.set_from_rgb_data(pixbuf.get_pixels(), pixbuf.get_has_alpha(), pixbuf.get_width(), pixbuf.get_height(), pixbuf.get_rowstride(), pixbuf.get_n_channels(), 0)
         except Exception:
-            pass
+            return
+        self._image.show()
+        self.queue_relayout()
+
+    def _on_load_finished(self, texture, error):
+        self._placeholder.hide()
+        if error is None:
+            self._image.show()
+            self.queue_relayout()
 
     def do_allocate(self, box, flags):
         width = box.x2 - box.x1
         height = box.y2 - box.y1
         inner_width = width - 2 * self._padding.x
         inner_height = height - 2 * self._padding.y
+        if inner_width > 0 and inner_height > 0:
+            self._inner_size = (int(inner_width), int(inner_height))
+
+        placeholder_box = clutter.ActorBox()
+        placeholder_box.x1 = self._padding.x
+        placeholder_box.y1 = self._padding.y
+        placeholder_box.x2 = self._padding.x + max(0, inner_width)
+        placeholder_box.y2 = self._padding.y + max(0, inner_height)
+        self._placeholder.allocate(placeholder_box, flags)
 
         image_width, image_height = self._image.get_preferred_size()[2:]
         if image_height > 0 and (image_width > inner_width or image_height > inner_height):
@@ -277,6 +350,9 @@ class FileChooser(BaseContainer):
             self.icons = dict()
         else:
             self.icons = icons
+        # file icons are packed together so that file rows share one texture
+        for icon_path in self.icons.itervalues():
+            ICONS.register(icon_path)
 
         self._buttons_flash_fct = None
         self._selected = None
@@ -309,7 +385,9 @@ class FileChooser(BaseContainer):
         button.set_border_color(self.styles['button_border_color'])
         button.set_texture(self.styles['button_texture'])
         self._add(self.top_container)
+        self._files = list()  # tuples with path, icon path, name, extension and is_dir
         self._files_list = LightList(element_size=self.styles['element_size'])
+        self._files_list.set_model(self._files, self._create_file_entry, self._bind_file_entry)
         self._files_panel = AutoScrollPanel(self._files_list)
         self._add(self._files_panel)
 
@@ -414,7 +492,7 @@ class FileChooser(BaseContainer):
         if self._buttons_flash_fct:
             self._buttons_flash_fct(self._validate)
         if self._selected is not None:
-            self.select_entry(self._selected)
+            self.select_index(self._selected)
 
     def _on_cancel(self, *args):
         if self._buttons_flash_fct:
@@ -474,7 +552,8 @@ class FileChooser(BaseContainer):
             self._slider.remove(path[2])
 
         self._selected = None
-        self._files_list.clear()
+        del self._files[:]
+        self._files_list.model_changed()
         self._current_dir = None
         self.paths = list()
 
@@ -492,7 +571,8 @@ class FileChooser(BaseContainer):
             self._slider.remove(path[2])
 
         self._selected = None
-        self._files_list.clear()
+        del self._files[:]
+        self._files_list.model_changed()
         self._current_dir = None
         self.paths = list()
         directory = self._base_dir
@@ -585,54 +665,64 @@ class FileChooser(BaseContainer):
         self._slider.set_buttons_flash_fct(fct)
 
     def select_next(self, *args):
-        files_entries = self._files_list.get_children()
-        if len(files_entries) == 0:
+        if len(self._files) == 0:
             return
 
         if self._selected is None:
-            self.select_entry(files_entries[0])
-        else:
-            index = files_entries.index(self._selected) + 1
-            try:
-                file_entry = files_entries[index]
-            except IndexError:
-                pass
-            else:
-                self.select_entry(file_entry)
+            self.select_index(0)
+        elif self._selected + 1 < len(self._files):
+            self.select_index(self._selected + 1)
 
     def select_previous(self, *args):
-        files_entries = self._files_list.get_children()
-        if len(files_entries) == 0:
+        if len(self._files) == 0:
             return
 
         if self._selected is None:
-            self.select_entry(files_entries[len(files_entries) - 1])
+            self.select_index(len(self._files) - 1)
+        elif self._selected > 0:
+            self.select_index(self._selected - 1)
+
+    def _create_file_entry(self):
+        file_entry = FileEntry()
+        file_entry.set_reactive(True)
+        file_entry.connect('button-release-event', self.select_entry)
+        return file_entry
+
+    def _bind_file_entry(self, file_entry, index, file_):
+        file_path, icon_src, name, extension, is_dir = file_
+        file_entry.set_file(name=file_path, icon_src=icon_src, text=name, extension=extension, is_dir=is_dir)
+        if index % 2 == 0:
+            file_entry.set_bg_color(self.styles['file_bg2'])
+            file_entry.set_selected_bg_color(self.styles['selected_bg2'])
         else:
-            index = files_entries.index(self._selected) - 1
-            if index == -1:
-                return
-            try:
-                file_entry = files_entries[index]
-            except IndexError:
-                pass
-            else:
-                self.select_entry(file_entry)
+            file_entry.set_bg_color(self.styles['file_bg'])
+            file_entry.set_selected_bg_color(self.styles['selected_bg'])
+        file_entry.set_selected(index == self._selected)
 
     def select_entry(self, source, event=None):
-        self.path = source.name
+        self.select_index(self._files_list.index(source), event)
+
+    def select_index(self, index, event=None):
+        file_path, icon_src, name, extension, is_dir = self._files[index]
+        self.path = file_path
         is_dir = os.path.isdir(self.path)
-        if not source.selected:
+        if index != self._selected:
             if self._selected is not None:
-                self._selected.set_selected(False)
-            self._selected = source
-            self.paths[-1][1] = source.text
-            source.set_selected(True)
+                previous_entry = self._files_list.get_row(self._selected)
+                if previous_entry is not None:
+                    previous_entry.set_selected(False)
+            self._selected = index
+            self.paths[-1][1] = name
+            file_entry = self._files_list.get_row(index)
+            if file_entry is not None:
+                file_entry.set_selected(True)
             self._video_container.remove_all()
             self.preview_block.remove_all()
+            self._preview.cancel()
             try:
                 mc = magic.open(magic.MAGIC_MIME_TYPE)
                 mc.load()
-                mime_type = mc.file(source.name)
+                mime_type = mc.file(file_path)
                 mc.close()
                 file_type = mime_type.split('/')[0]
             except Exception:
@@ -660,7 +750,7 @@ class FileChooser(BaseContainer):
                 else:
                     self.preview_block.hide()
                 if self._delete_file_button:
-                    self._delete_file_button.set_lock(bool(self._can_delete and not self._can_delete(source.name)))
+                    self._delete_file_button.set_lock(bool(self._can_delete and not self._can_delete(file_path)))
         elif event is None:
             if is_dir:
                 self.open_dir(self.path)
@@ -734,7 +824,7 @@ class FileChooser(BaseContainer):
 
     def change_dir(self, dir_path, selected=None):
         self._selected = None
-        self._files_list.clear()
+        del self._files[:]
         self._current_dir = dir_path
         files = os.listdir(dir_path)
 
@@ -753,12 +843,12 @@ class FileChooser(BaseContainer):
 
         files.sort(cmp=self._files_comparator)
 
-        cycle = 'even'
         index = 0
         if len(files) > 0:
             self.right_container.show()
         else:
             self.right_container.hide()
+        # only the displayed entries are built by the files list
         for name in files:
             file_path = os.path.join(dir_path, name)
             is_dir = os.path.isdir(file_path)
@@ -768,29 +858,17 @@ class FileChooser(BaseContainer):
             else:
                 extension = os.path.splitext(name)[1][1:]
                 icon_src = self.icons.get(extension, self.icons['default'])
-            file_entry = FileEntry(name=file_path, icon_src=icon_src, text=name, extension=extension, is_dir=is_dir)
-            file_entry.set_reactive(True)
-            file_entry.connect('button-release-event', self.select_entry)
-            if cycle == 'even':
-                cycle = 'odd'
-                file_entry.set_bg_color(self.styles['file_bg2'])
-                file_entry.set_selected_bg_color(self.styles['selected_bg2'])
-            else:
-                cycle = 'even'
-                file_entry.set_bg_color(self.styles['file_bg'])
-                file_entry.set_selected_bg_color(self.styles['selected_bg'])
-            self._files_list.add(file_entry)
             if name == selected:
-                index = files.index(name)
+                index = len(self._files)
+            self._files.append((file_path, icon_src, name, extension, is_dir))
+        self._files_list.model_changed()
         self._files_panel.check_scrollbar()
 
         # select index
-        try:
-            to_select = self._files_list.get_children()[index]
-        except IndexError:
-            self.preview_block.hide()
+        if index < len(self._files):
+            self.select_index(index)
         else:
-            self.select_entry(to_select)
+            self.preview_block.hide()
 
     def _return_to_index(self, index):
         current_index = len(self.paths)
@@ -3,9 +3,9 @@
 
 import operator
 import clutter
-from container import BaseContainer
+from container import BaseContainer, PreferredSizeCache, AllocationCache
 
-class FlowBox(BaseContainer):
+class FlowBox(PreferredSizeCache, AllocationCache, BaseContainer):
     """
     A Flow container.
 
@@ -18,7 +18,7 @@ class FlowBox(BaseContainer):
 
     def do_add(self, *children):
         for child in children:
-            if child in self._children:
+            if child in self._children_set:
                 raise Exception("Actor %s is already a children of %s" % (
                     child, self))
             self._add(child)
@@ -26,15 +26,18 @@ class FlowBox(BaseContainer):
     
     def do_remove(self, *children):
         for child in children:
-            if child in self._children:
-                self._children.remove(child)
+            if child in self._children_set:
+                self._remove_child(child)
                 child.unparent()
                 self.queue_relayout()
             else:
                 raise Exception("Actor %s is not a child of %s" % (
                     child, self))
 
-    def do_get_preferred_width(self, for_height):
+    do_get_preferred_width = PreferredSizeCache.do_get_preferred_width
+    do_get_preferred_height = PreferredSizeCache.do_get_preferred_height
+
+    def _compute_preferred_width(self, for_height):
         #sys.stdout.write('do_get_preferred_width(%s)' %(for_height))
         min_width = 0
         natural_width = 0
@@ -48,7 +51,7 @@ class FlowBox(BaseContainer):
         #print ' ->', (min_width, natural_width)
         return (min_width, natural_width)
 
-    def do_get_preferred_height(self, for_width):
+    def _compute_preferred_height(self, for_width):
         #sys.stdout.write('do_get_preferred_height(%s)' %(for_width))
         lines = self._map_lines(for_width)
         minimal_height = reduce(operator.add, (l['height'] for l in lines))
@@ -74,6 +77,9 @@ class FlowBox(BaseContainer):
         return lines
 
     def do_allocate(self, box, flags):
+        if self._allocation_unchanged(box, flags, self._children):
+            clutter.Actor.do_allocate(self, box, flags)
+            return
         box_width, box_height = self.get_preferred_size()[2:]
         #print box_width, 'x', box_height
         
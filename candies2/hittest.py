@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*
+
+import math
+import clutter
+import gobject
+from container import BaseContainer
+from circle import Circle
+from disk import Disk
+from percentround import PercentRound
+
+
+# actors picked with their own shape, a GL pick is done when one of them is hit
+NON_RECTANGULAR_TYPES = [Circle, Disk, PercentRound]
+
+# properties of a child which move its picked area
+GEOMETRY_PROPERTIES = ('allocation', 'anchor-x', 'anchor-y', 'visible', 'reactive',
+                       'scale-x', 'scale-y', 'rotation-angle-x', 'rotation-angle-y',
+                       'rotation-angle-z', 'has-clip', 'clip')
+
+# GObject data keys: python wrappers of actors are transient, the index of
+# a container and the index watching a child are kept on the GObjects
+_INDEX_KEY = 'candies2-hit-index'
+_WATCHING_INDEX_KEY = 'candies2-hit-watching-index'
+
+def register_non_rectangular_type(actor_type):
+    if actor_type not in NON_RECTANGULAR_TYPES:
+        NON_RECTANGULAR_TYPES.append(actor_type)
+
+
+def _contains(actor, x, y):
+    # the clip of an actor (scrolled contents are clipped outside of their
+    # allocation), or its allocation
+    if actor.has_clip():
+        clip_x, clip_y, clip_width, clip_height = actor.get_clip()
+        return clip_x <= x < clip_x + clip_width and clip_y <= y < clip_y + clip_height
+    box = actor.get_allocation_box()
+    return 0 <= x < box.x2 - box.x1 and 0 <= y < box.y2 - box.y1
+
+def _get_extents(actor):
+    # the area tested by _contains, in the parent coordinates
+    box = actor.get_allocation_box()
+    anchor_x, anchor_y = actor.get_anchor_point()
+    origin_x = box.x1 - anchor_x
+    origin_y = box.y1 - anchor_y
+    if actor.has_clip():
+        clip_x, clip_y, clip_width, clip_height = actor.get_clip()
+        return (origin_x + clip_x, origin_y + clip_y, origin_x + clip_x + clip_width, origin_y + clip_y + clip_height)
+    return (origin_x, origin_y, origin_x + box.x2 - box.x1, origin_y + box.y2 - box.y1)
+
+def _get_transformed_extents(actor):
+    # bounding box of a transformed actor allocation, in stage coordinates
+    try:
+        vertices = actor.get_abs_allocation_vertices()
+    except Exception:
+        return None
+    xs = [vertex.x for vertex in vertices]
+    ys = [vertex.y for vertex in vertices]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class SpatialGrid(object):
+    '''
+    A uniform grid indexing rectangles, items are returned in insertion
+    order (the last inserted item is the topmost one).
+    '''
+
+    def __init__(self, x1, y1, x2, y2, count):
+        side = max(1, int(math.ceil(math.sqrt(count))))
+        self.x1 = x1
+        self.y1 = y1
+        self.cell_width = max(1.0, float(x2 - x1) / side)
+        self.cell_height = max(1.0, float(y2 - y1) / side)
+        self._cells = dict()
+        self._count = 0
+
+    def _get_cell(self, x, y):
+        return int((x - self.x1) // self.cell_width), int((y - self.y1) // self.cell_height)
+
+    def insert(self, item, x1, y1, x2, y2):
+        first_column, first_row = self._get_cell(x1, y1)
+        last_column, last_row = self._get_cell(x2, y2)
+        entry = (self._count, item)
+        self._count += 1
+        for column in xrange(first_column, last_column + 1):
+            for row in xrange(first_row, last_row + 1):
+                self._cells.setdefault((column, row), list()).append(entry)
+
+    def query(self, x, y):
+        '''Returns the items of the cell containing a point, topmost first'''
+        entries = self._cells.get(self._get_cell(x, y))
+        if not entries:
+            return list()
+        return [item for order, item in reversed(entries)]
+
+    def __len__(self):
+        return self._count
+
+
+class _ContainerIndex(object):
+    '''Grid of the children of a container, rebuilt when a child geometry changes'''
+
+    def __init__(self, container):
+        self._grid = None
+        container.connect('notify', self._on_notify)
+        container.connect('queue-relayout', self._on_changed)
+
+    def _on_changed(self, *args):
+        self._grid = None
+
+    def _on_notify(self, actor, pspec):
+        if pspec.name in GEOMETRY_PROPERTIES:
+            self._grid = None
+
+    def get_candidates(self, children, x, y):
+        if self._grid is None:
+            x1 = y1 = x2 = y2 = None
+            boxes = list()
+            for child in children:
+                if child.get_data(_WATCHING_INDEX_KEY) is not self:
+                    child.connect('notify', self._on_notify)
+                    child.set_data(_WATCHING_INDEX_KEY, self)
+                child_box = _get_extents(child)
+                boxes.append((child, child_box))
+                if x1 is None:
+                    x1, y1, x2, y2 = child_box
+                else:
+                    x1 = min(x1, child_box[0])
+                    y1 = min(y1, child_box[1])
+                    x2 = max(x2, child_box[2])
+                    y2 = max(y2, child_box[3])
+            if x1 is None:
+                return list()
+            self._grid = SpatialGrid(x1, y1, x2, y2, len(boxes))
+            for child, child_box in boxes:
+                self._grid.insert(child, *child_box)
+        return self._grid.query(x, y)
+
+
+class HitTester(gobject.GObject):
+    '''
+    Finds the reactive actor under a stage position without GL picking.
+
+    The actors tree is walked from the stage using anchor points and the
+    clip of each actor, or its allocation when it has no clip (scrolled
+    contents are clipped outside of their allocation). Children painted
+    outside of their parent clip or allocation are not found. Children of
+    containers with at least GRID_MIN_CHILDREN children are looked up in a
+    uniform grid kept per container (on the container GObject) and rebuilt
+    when the container queues a relayout or a child geometry changes.
+    A GL pick (stage.get_actor_at_pos) is done when the position is in the
+    transformed bounding box of a rotated or scaled actor, or on an actor
+    of NON_RECTANGULAR_TYPES.
+    '''
+    __gtype_name__ = 'HitTester'
+
+    GRID_MIN_CHILDREN = 16
+
+    def __init__(self, stage):
+        gobject.GObject.__init__(self)
+        self.stage = stage
+        self.gl_picks = 0
+
+    def get_actor_at_pos(self, x, y):
+        actor = self._hit(self.stage, x, y, x, y)
+        if actor is None:
+            return self.stage
+        if actor is False:
+            self.gl_picks += 1
+            return self.stage.get_actor_at_pos(clutter.PICK_REACTIVE, int(x), int(y))
+        return actor
+
+    def _get_children(self, actor):
+        if not isinstance(actor, clutter.Container):
+            return list()
+        if isinstance(actor, BaseContainer):
+            if not actor.is_pick_enabled():
+                return list()
+        elif not getattr(actor, 'pick_enabled', True):
+            return list()
+        return clutter.Container.get_children(actor)
+
+    def _get_candidates(self, actor, children, x, y):
+        if len(children) < self.GRID_MIN_CHILDREN:
+            return reversed(children)
+        index = actor.get_data(_INDEX_KEY)
+        if index is None:
+            index = _ContainerIndex(actor)
+            actor.set_data(_INDEX_KEY, index)
+        return index.get_candidates(children, x, y)
+
+    def _hit(self, actor, x, y, stage_x, stage_y):
+        # returns the actor hit, None if no actor is hit or False if a GL pick is needed
+        if actor.has_clip():
+            clip_x, clip_y, clip_width, clip_height = actor.get_clip()
+            if x < clip_x or y < clip_y or x >= clip_x + clip_width or y >= clip_y + clip_height:
+                return None
+        children = self._get_children(actor)
+        for child in self._get_candidates(actor, children, x, y):
+            if not child.get_property('visible'):
+                continue
+            if child.is_rotated() or child.is_scaled():
+                extents = _get_transformed_extents(child)
+                if extents is None:
+                    return False
+                x1, y1, x2, y2 = extents
+                if x1 <= stage_x < x2 and y1 <= stage_y < y2:
+                    return False
+                continue
+            box = child.get_allocation_box()
+            anchor_x, anchor_y = child.get_anchor_point()
+            child_x = x - box.x1 + anchor_x
+            child_y = y - box.y1 + anchor_y
+            if _contains(child, child_x, child_y):
+                hit = self._hit(child, child_x, child_y, stage_x, stage_y)
+                if hit is not None:
+                    return hit
+        if actor is not self.stage and actor.get_reactive():
+            if _contains(actor, x, y):
+                if isinstance(actor, tuple(NON_RECTANGULAR_TYPES)):
+                    return False
+                return actor
+        return None
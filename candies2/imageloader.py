@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*
+
+import time
+import traceback
+import multiprocessing
+import collections
+import gobject
+
+try:
+    from gtk import gdk
+except ImportError:
+    gdk = None
+
+
+def pack_pixbuf(pixbuf):
+    """Returns the pixels and format of pixbuf, to be sent between processes"""
+    return (pixbuf.get_pixels(), pixbuf.get_has_alpha(), pixbuf.get_bits_per_sample(),
+            pixbuf.get_width(), pixbuf.get_height(), pixbuf.get_rowstride())
+
+def unpack_pixbuf(data):
+    pixels, has_alpha, bits_per_sample, width, height, rowstride = data
+    return gdk.pixbuf_new_from_data(pixels, gdk.COLORSPACE_RGB, has_alpha, bits_per_sample, width, height, rowstride)
+
+def _decode(path, width, height):
+    # runs in a process of the pool, returns the packed pixbuf or None on error
+    try:
+        if width > 0 or height > 0:
+            pixbuf = gdk.pixbuf_new_from_file_at_size(path, width, height)
+        else:
+            pixbuf = gdk.pixbuf_new_from_file(path)
+        return pack_pixbuf(pixbuf)
+    except Exception:
+        return None
+
+def _call(function, args):
+    # runs in a process of the pool and always returns (ok, result or error
+    # text): apply_async has no error callback, a raising job would never
+    # be delivered
+    try:
+        return True, function(*args)
+    except:
+        return False, traceback.format_exc()
+
+
+class ImageRequest(object):
+    """A pending job, the callback is not called once cancelled"""
+
+    def __init__(self, function, args, callback, callback_args):
+        self.function = function
+        self.args = args
+        self.callback = callback
+        self.callback_args = callback_args
+        self.cancelled = False
+        # traceback of the job if it failed
+        self.error = None
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class ImageLoader(object):
+    """
+    Decodes image files to gtk.gdk pixbufs in a pool of processes (pygtk
+    keeps the GIL while decoding, worker threads would block the main
+    loop), the images are scaled down to the requested size (keeping their
+    ratio) by the workers. callback(pixbuf, *args) is called from the main
+    loop, with None as pixbuf if the image can not be decoded. At most one
+    job per process is sent to the pool, requests cancelled before being
+    sent are skipped, requests cancelled after are dropped. Jobs failing or
+    lasting more than job_timeout seconds (a worker process died) are
+    delivered as None.
+
+    The pool is forked by start, or by the first request. Forking is only
+    safe before the application starts threads: applications should call
+    start_image_loader when they start. Results are delivered to the main
+    loop from a thread of the pool, applications using the loader must call
+    gobject.threads_init (and clutter.threads_init) before clutter.init so
+    that the main loop releases the GIL. Loading is not available without
+    gtk.gdk (see is_available).
+    """
+
+    def __init__(self, processes=2, job_timeout=60):
+        self.processes = processes
+        self.job_timeout = job_timeout
+        self._pool = None
+        self._pending = collections.deque()
+        # request -> time it was sent to the pool
+        self._running = dict()
+        self._timeout_source = None
+
+    def is_available(self):
+        return gdk is not None
+
+    def start(self):
+        if gdk is None:
+            raise Exception('gtk.gdk is required to decode images with %s' % self)
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.processes)
+
+    def load(self, path, width=-1, height=-1, callback=None, *args):
+        return self.run(_decode, (path, width, height), self._on_decoded, callback, *args)
+
+    def _on_decoded(self, data, callback, *args):
+        if callback is not None:
+            if data is None:
+                callback(None, *args)
+            else:
+                callback(unpack_pixbuf(data), *args)
+
+    def run(self, function, args, callback=None, *callback_args):
+        """
+        Calls function(*args) in the pool, then callback(result,
+        *callback_args) from the main loop, result is None if function
+        raised or timed out. function must be a module function defined
+        before the pool is started, and its result must be picklable.
+        """
+        self.start()
+        request = ImageRequest(function, args, callback, callback_args)
+        self._pending.append(request)
+        self._send_next()
+        return request
+
+    def _send_next(self):
+        while self._pending and len(self._running) < self.processes:
+            request = self._pending.popleft()
+            if request.cancelled:
+                continue
+            self._running[request] = time.time()
+            def on_done(outcome, request=request):
+                # called from a thread of the pool
+                gobject.idle_add(self._deliver, request, outcome)
+            self._pool.apply_async(_call, (request.function, request.args), callback=on_done)
+        if self._running and self._timeout_source is None:
+            self._timeout_source = gobject.timeout_add(1000, self._check_timeouts)
+
+    def _check_timeouts(self):
+        now = time.time()
+        for request, sent_time in self._running.items():
+            if now - sent_time > self.job_timeout:
+                self._deliver(request, (False, 'Timeout of %s' % self))
+        if self._running:
+            return True
+        self._timeout_source = None
+        return False
+
+    def _deliver(self, request, outcome):
+        if self._running.pop(request, None) is None:
+            # already delivered as timed out
+            return False
+        ok, result = outcome
+        if not ok:
+            request.error = result
+            result = None
+        self._send_next()
+        if not request.cancelled and request.callback is not None:
+            request.callback(result, *request.callback_args)
+        return False
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+        self._pending.clear()
+        self._running.clear()
+
+IMAGES = ImageLoader()
+
+def start_image_loader():
+    """Forks the image decoding processes, to be called before starting threads"""
+    IMAGES.start()
@@ -7,6 +7,7 @@ import gobject
 import os
 import string
 from buttons import ClassicButton
+from container import AllocationCache, PaintCulling
 
 
 # Key class: name, width, event default event=char width=1
@@ -199,7 +200,7 @@ class ButtonLine(object):
         self.buttons.append(button)
         self.width += width
 
-class Keyboard(clutter.Actor, clutter.Container):
+class Keyboard(AllocationCache, PaintCulling, clutter.Actor, clutter.Container):
     '''
     Keyboard Class
         .load_profile = load a keyboard mapping dictionnary
@@ -384,6 +385,7 @@ class Keyboard(clutter.Actor, clutter.Container):
         
         if self._width > 0 and self._height > 0:
             self._refresh_allocation_params()
+        self.queue_relayout()
     
     def to_min(self):
         if self._map_name.endswith('_maj'):
@@ -402,6 +404,7 @@ class Keyboard(clutter.Actor, clutter.Container):
         self._lines = list()
         self._map_name = None
         self._keyboard_map = None
+        self.queue_relayout()
     
     def select_all(self):
         self._text_actor.set_cursor_position(0)
@@ -728,6 +731,10 @@ class Keyboard(clutter.Actor, clutter.Container):
     
     # button mapping: calcul each buttons width and place them
     def do_allocate(self, box, flags):
+        buttons = [button for line in self._lines for button in line.buttons]
+        if self._allocation_unchanged(box, flags, buttons):
+            clutter.Actor.do_allocate(self, box, flags)
+            return
         width = box.x2 - box.x1
         height = box.y2 - box.y1
         
@@ -759,9 +766,11 @@ class Keyboard(clutter.Actor, clutter.Container):
                 func(button, data)
     
     def do_paint(self):
+        area = self._get_paint_area()
         for line in self._lines:
             for button in line.buttons:
-                button.paint()
+                if area is None or common.is_in_area(button, area):
+                    button.paint()
     
     def do_pick(self, color):
         self.do_paint()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*
+
+import time
+import clutter
+import gobject
+
+
+class KineticScroller(gobject.GObject):
+    '''
+    Collects scroll input and applies it once per frame.
+
+    Pointer positions given to move() are accumulated and the callback is
+    called once per frame (on a timeline new-frame) with the total delta
+    since the previous frame. If kinetic is True, the pointer velocity is
+    tracked and the scrolling continues after release with a deceleration.
+
+    The callback receives a delta in pixels and must return False when the
+    scrolling cannot go further (to stop the deceleration).
+    '''
+    __gtype_name__ = 'KineticScroller'
+
+    # duration used to compute release velocity (in seconds)
+    VELOCITY_WINDOW = 0.1
+
+    def __init__(self, callback, kinetic=True, friction=0.95, min_velocity=20):
+        gobject.GObject.__init__(self)
+        self.callback = callback
+        self.kinetic = kinetic
+        # velocity factor applied every 1/60 second
+        self.friction = friction
+        # velocity (in pixels per second) under which deceleration stops
+        self.min_velocity = min_velocity
+        self._position = None
+        self._pending_delta = 0
+        self._samples = list()
+        self._velocity = 0
+        self._last_frame_time = None
+        self._timeline = clutter.Timeline(duration=1000)
+        self._timeline.set_loop(True)
+        self._timeline.connect('new-frame', self._on_new_frame)
+
+    def press(self, position):
+        self._timeline.stop()
+        self._velocity = 0
+        self._pending_delta = 0
+        self._position = position
+        self._samples = [(time.time(), position)]
+
+    def move(self, position):
+        if self._position is None:
+            return
+        self._pending_delta += position - self._position
+        self._position = position
+        now = time.time()
+        self._samples.append((now, position))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.VELOCITY_WINDOW:
+            self._samples.pop(0)
+        if not self._timeline.is_playing():
+            self._last_frame_time = None
+            self._timeline.start()
+
+    def release(self, position=None):
+        if self._position is None:
+            return
+        if position is not None:
+            self.move(position)
+        self._position = None
+        self._velocity = 0
+        if self.kinetic and len(self._samples) > 1:
+            first_time, first_position = self._samples[0]
+            last_time, last_position = self._samples[-1]
+            if last_time - first_time > 0 and time.time() - last_time < self.VELOCITY_WINDOW:
+                self._velocity = (last_position - first_position) / (last_time - first_time)
+        self._samples = list()
+        if abs(self._velocity) < self.min_velocity:
+            self._velocity = 0
+            if self._pending_delta == 0:
+                self._timeline.stop()
+        elif not self._timeline.is_playing():
+            self._last_frame_time = None
+            self._timeline.start()
+
+    def stop(self):
+        self._timeline.stop()
+        self._position = None
+        self._pending_delta = 0
+        self._velocity = 0
+        self._samples = list()
+
+    def is_running(self):
+        return self._timeline.is_playing()
+
+    def _on_new_frame(self, timeline, msecs):
+        now = time.time()
+        if self._last_frame_time is None:
+            elapsed = 1 / 60.
+        else:
+            elapsed = now - self._last_frame_time
+        self._last_frame_time = now
+        if self._pending_delta != 0:
+            delta = self._pending_delta
+            self._pending_delta = 0
+            if not self.callback(delta):
+                self._velocity = 0
+        elif self._velocity != 0:
+            self._velocity *= self.friction ** (elapsed * 60)
+            if abs(self._velocity) < self.min_velocity or not self.callback(self._velocity * elapsed):
+                self._velocity = 0
+        if self._pending_delta == 0 and self._velocity == 0:
+            # restarted by next move or release
+            self._timeline.stop()
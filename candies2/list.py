@@ -1,102 +1,444 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*
 
+import math
 import gobject
 import clutter
 import common
 from container import BaseContainer
 
 
+class PrefixSumTree(object):
+    '''
+    A Fenwick tree storing a list of values.
+    
+    Prefix sums, value updates, appends and position searches are done in
+    O(log n). Inserting or removing a value in the middle rebuilds the tree
+    in O(n).
+    '''
+    
+    def __init__(self, values=None):
+        object.__init__(self)
+        self.rebuild(values or list())
+    
+    def __len__(self):
+        return len(self._values)
+    
+    def __getitem__(self, index):
+        return self._values[index]
+    
+    def rebuild(self, values):
+        self._values = list(values)
+        count = len(self._values)
+        self._tree = [0] + self._values
+        for i in xrange(1, count + 1):
+            parent = i + (i & -i)
+            if parent <= count:
+                self._tree[parent] += self._tree[i]
+        self._update_top()
+    
+    def _update_top(self):
+        self._top = 1
+        while self._top * 2 <= len(self._values):
+            self._top *= 2
+    
+    def prefix(self, index):
+        '''Returns the sum of the values before the given index'''
+        result = 0
+        while index > 0:
+            result += self._tree[index]
+            index -= index & -index
+        return result
+    
+    def total(self):
+        return self.prefix(len(self._values))
+    
+    def update(self, index, value):
+        delta = value - self._values[index]
+        self._values[index] = value
+        index += 1
+        count = len(self._values)
+        while index <= count:
+            self._tree[index] += delta
+            index += index & -index
+    
+    def append(self, value):
+        self._values.append(value)
+        index = len(self._values)
+        self._tree.append(value + self.prefix(index - 1) - self.prefix(index - (index & -index)))
+        self._update_top()
+    
+    def insert(self, index, value):
+        values = self._values
+        values.insert(index, value)
+        self.rebuild(values)
+    
+    def pop(self, index=-1):
+        values = self._values
+        value = values.pop(index)
+        self.rebuild(values)
+        return value
+    
+    def search(self, position):
+        '''
+        Returns the index of the value containing the given position, that is
+        the last index for which prefix(index) <= position, or len(self) if
+        position is beyond the total.
+        '''
+        if position < 0:
+            return 0
+        index = 0
+        step = self._top
+        count = len(self._values)
+        while step:
+            next_index = index + step
+            if next_index <= count and self._tree[next_index] <= position:
+                index = next_index
+                position -= self._tree[next_index]
+            step >>= 1
+        return index
+
+
 class LightList(BaseContainer):
     '''
     LightList is a light weight list to optimize long list with scrollbars
     All elements in this list will have the same height
+
+    The list can also be backed by a model (see set_model). In this mode, only
+    the rows displayed in the clip area (plus buffer_size rows on each side)
+    are built, and row actors are recycled and rebound to other items when
+    the clip moves. Rows are bound when the clip or the model changes, or
+    from the main loop after an allocation change of a list without clip.
     '''
     __gtype_name__ = 'LightList'
     
-    def __init__(self, element_size=50, padding=0, spacing=0, horizontal=False):
+    def __init__(self, element_size=50, padding=0, spacing=0, horizontal=False, buffer_size=2):
         BaseContainer.__init__(self, allow_add=True, allow_remove=True)
         self.element_size = element_size
+        self.buffer_size = buffer_size
         self._horizontal = horizontal
         self._padding = common.Padding(padding)
         self._spacing = common.Spacing(spacing)
+        # indexes of the children displayed by the last clip, None if unknown
+        self._visible_range = None
+        # model mode
+        self._model = None
+        self._row_factory = None
+        self._row_binder = None
+        self._rows = dict()
+        self._rows_indexes = dict()
+        self._free_rows = list()
+        # row bound to the first item, only used to measure rows
+        self._probe_row = None
+        self._probe_bound = False
+        self._deferred_update = None
+        self._clip = None
+        self._allocation_box = None
+        self._allocation_flags = clutter.ALLOCATION_NONE
     
     def get_children(self):
         return self._children
     
+    def set_model(self, model, row_factory=None, row_binder=None):
+        '''
+        Use a data provider instead of actors added one by one.
+        
+        model is any object implementing __len__ and __getitem__ (list, tuple...).
+        row_factory is called without argument to build a new row actor.
+        row_binder is called with (row, index, item) to display an item in a row.
+        Call model_changed when the content of the model has been modified.
+        Set model to None to go back to the standard mode.
+        '''
+        self.clear()
+        if model is not None:
+            if row_factory is None or row_binder is None:
+                raise ValueError('A row factory and a row binder are required to use a model in %s' % self)
+            self._model = model
+            self._row_factory = row_factory
+            self._row_binder = row_binder
+            self._update_rows()
+            self.queue_relayout()
+    
+    def get_model(self):
+        return self._model
+    
+    def model_changed(self):
+        if self._model is None:
+            return
+        for index in self._rows.keys():
+            self._release_row(index)
+        self._probe_bound = False
+        self._update_rows()
+        self.queue_relayout()
+    
+    def get_row(self, index):
+        '''Returns the row actor bound to the item at given index or None if this row is not built'''
+        return self._rows.get(index)
+    
+    def get_rows(self):
+        '''Returns a dict with indexes as keys and bound row actors as values'''
+        return self._rows
+    
+    def _get_visible_range(self, offset, length, count):
+        # returns the first and the last (excluded) indexes of elements displayed in [offset, offset + length]
+        if self._horizontal:
+            start = self._padding.x
+            step = self.element_size + self._spacing.x
+        else:
+            start = self._padding.y
+            step = self.element_size + self._spacing.y
+        if count == 0 or length <= 0 or step <= 0:
+            return 0, 0
+        first = int(math.floor(float(offset - start - self.element_size) / step)) + 1
+        last = int(math.ceil(float(offset + length - start) / step))
+        first = min(max(first, 0), count)
+        last = min(max(last, first), count)
+        return first, last
+    
+    def _get_row_box(self, index):
+        width = self._allocation_box.x2 - self._allocation_box.x1
+        height = self._allocation_box.y2 - self._allocation_box.y1
+        row_box = clutter.ActorBox()
+        if self._horizontal:
+            row_box.x1 = self._padding.x + index * (self.element_size + self._spacing.x)
+            row_box.y1 = self._padding.y
+            row_box.x2 = row_box.x1 + self.element_size
+            row_box.y2 = height - self._padding.y
+        else:
+            row_box.x1 = self._padding.x
+            row_box.y1 = self._padding.y + index * (self.element_size + self._spacing.y)
+            row_box.x2 = width - self._padding.x
+            row_box.y2 = row_box.y1 + self.element_size
+        return row_box
+    
+    def _bind_row(self, index):
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = self._row_factory()
+            row.set_parent(self)
+            self._append_child(row)
+        self._row_binder(row, index, self._model[index])
+        self._rows[index] = row
+        self._rows_indexes[row] = index
+        row.show()
+        return row
+    
+    def _get_probe_row(self):
+        if self._probe_row is None:
+            self._probe_row = self._row_factory()
+        if not self._probe_bound and len(self._model):
+            self._row_binder(self._probe_row, 0, self._model[0])
+            self._probe_bound = True
+        return self._probe_row
+    
+    def _get_measured_row(self):
+        # returns the actor giving the cross size of the rows, or None
+        if self._model is not None:
+            if len(self._model):
+                return self._get_probe_row()
+            return None
+        if self._children:
+            return self._children[0]
+        return None
+    
+    def _defer_update(self):
+        # rows can not be bound nor relayout queued while allocating
+        if self._deferred_update is None:
+            self._deferred_update = gobject.idle_add(self._do_deferred_update)
+    
+    def _do_deferred_update(self):
+        self._deferred_update = None
+        if self._model is not None:
+            self._update_rows()
+        self.queue_relayout()
+        return False
+    
+    def _release_row(self, index):
+        row = self._rows.pop(index)
+        del self._rows_indexes[row]
+        row.hide()
+        self._free_rows.append(row)
+    
+    def _update_rows(self):
+        # bind rows for displayed items and release the others, returns the newly bound rows
+        count = len(self._model)
+        if self._clip is not None:
+            x_offset, y_offset, width, height = self._clip
+            if self._horizontal:
+                first, last = self._get_visible_range(x_offset, width, count)
+            else:
+                first, last = self._get_visible_range(y_offset, height, count)
+        elif self._allocation_box is not None:
+            if self._horizontal:
+                length = self._allocation_box.x2 - self._allocation_box.x1
+            else:
+                length = self._allocation_box.y2 - self._allocation_box.y1
+            first, last = self._get_visible_range(0, length, count)
+        else:
+            first, last = 0, 0
+        if last > first:
+            first = max(0, first - self.buffer_size)
+            last = min(count, last + self.buffer_size)
+        for index in self._rows.keys():
+            if index < first or index >= last:
+                self._release_row(index)
+        new_rows = list()
+        for index in xrange(first, last):
+            if index not in self._rows:
+                new_rows.append((index, self._bind_row(index)))
+        return new_rows
+    
+    def do_add(self, *children):
+        if self._model is not None:
+            raise Exception('Cannot add actors to %s, it is backed by a model' % self)
+        self._visible_range = None
+        BaseContainer.do_add(self, *children)
+    
+    def do_remove(self, *children):
+        # also called when a child is destroyed
+        for child in children:
+            index = self._rows_indexes.pop(child, None)
+            if index is not None:
+                del self._rows[index]
+            elif child in self._free_rows:
+                self._free_rows.remove(child)
+        BaseContainer.do_remove(self, *children)
+        self._visible_range = None
+    
     def add_actor_after(self, actor, after):
-        if actor in self._children:
+        if self._model is not None:
+            raise Exception('Cannot add actors to %s, it is backed by a model' % self)
+        if actor in self._children_set:
             raise Exception('Actor %s is already a children of %s' % (actor, self))
         try:
-            index = self._children.index(after)
+            index = self._child_index(after)
         except ValueError:
             raise ValueError('Actor %s is not a children of %s' %(after, self))
         actor.set_parent(self)
-        self._children.insert(index, actor)
+        self._insert_child(index, actor)
+        self._visible_range = None
         self.queue_relayout()
     
     def insert(self, index, actor):
-        if actor in self._children:
+        if self._model is not None:
+            raise Exception('Cannot add actors to %s, it is backed by a model' % self)
+        if actor in self._children_set:
             raise Exception('Actor %s is already a children of %s' % (actor, self))
         actor.set_parent(self)
-        self._children.insert(index, actor)
+        self._insert_child(index, actor)
+        self._visible_range = None
         self.queue_relayout()
     
     def clear(self):
         for child in self._children:
             child.unparent()
             child.destroy()
-        self._children = list()
+        self._clear_children()
+        self._visible_range = None
+        self._model = None
+        self._row_factory = None
+        self._row_binder = None
+        self._rows = dict()
+        self._rows_indexes = dict()
+        self._free_rows = list()
+        if self._probe_row is not None:
+            self._probe_row.destroy()
+            self._probe_row = None
+        self._probe_bound = False
         self.queue_relayout()
     
+    def do_destroy(self):
+        if self._deferred_update is not None:
+            gobject.source_remove(self._deferred_update)
+            self._deferred_update = None
+        if self._probe_row is not None:
+            self._probe_row.destroy()
+            self._probe_row = None
+        BaseContainer.do_destroy(self)
+    
     def remove(self, child_or_index):
-        if child_or_index in self._children:
+        if self._model is not None:
+            raise Exception('Cannot remove actors from %s, it is backed by a model' % self)
+        if child_or_index in self._children_set:
             child = child_or_index
-            index = self._children.index(child)
         elif child_or_index < len(self._children):
-            index = child_or_index
-            child = self._children[index]
+            child = self._children[child_or_index]
         child.unparent()
-        self._children.pop(index)
+        self._remove_child(child)
+        self._visible_range = None
         self.queue_relayout()
         return child
     
     def remove_all(self):
+        if self._model is not None:
+            raise Exception('Cannot remove actors from %s, it is backed by a model' % self)
         for child in self._children:
             child.unparent()
-        self._children = list()
+        self._clear_children()
+        self._visible_range = None
         self.queue_relayout()
     
     def index(self, child):
-        return self._children.index(child)
+        if self._model is not None:
+            try:
+                return self._rows_indexes[child]
+            except KeyError:
+                raise ValueError('Actor %s is not a bound row of %s' %(child, self))
+        return self._child_index(child)
+    
+    def _get_count(self):
+        if self._model is not None:
+            return len(self._model)
+        return len(self._children)
     
     def do_get_preferred_width(self, for_height):
         preferred_width = 2*self._padding.x
-        if self._children:
+        count = self._get_count()
+        if count:
             if self._horizontal:
-                preferred_width += len(self._children) * (self.element_size + self._spacing.x) - self._spacing.x
+                preferred_width += count * (self.element_size + self._spacing.x) - self._spacing.x
             else:
+                row = self._get_measured_row()
                 if for_height == -1:
                     h = for_height - 2*self._padding.y
                 else:
                     h = for_height
-                preferred_width += self._children[0].get_preferred_width(for_height=h)[1]
+                preferred_width += row.get_preferred_width(for_height=h)[1]
         return preferred_width, preferred_width
     
     def do_get_preferred_height(self, for_width):
         preferred_height = 2*self._padding.y
-        if self._children:
+        count = self._get_count()
+        if count:
             if self._horizontal:
+                row = self._get_measured_row()
                 if for_width == -1:
                     w = for_width - 2*self._padding.x
                 else:
                     w = for_width
-                preferred_height += self._children[0].get_preferred_height(for_width=w)[1]
+                preferred_height += row.get_preferred_height(for_width=w)[1]
             else:
-                preferred_height += len(self._children) * (self.element_size + self._spacing.y) - self._spacing.y
+                preferred_height += count * (self.element_size + self._spacing.y) - self._spacing.y
         return preferred_height, preferred_height
     
     def do_allocate(self, box, flags):
+        if self._model is not None:
+            previous_box = self._allocation_box
+            self._allocation_box = clutter.ActorBox(box.x1, box.y1, box.x2, box.y2)
+            self._allocation_flags = flags
+            if self._clip is None:
+                # without clip, the displayed rows depend on the allocation length
+                if self._horizontal:
+                    resized = previous_box is None or previous_box.x2 - previous_box.x1 != box.x2 - box.x1
+                else:
+                    resized = previous_box is None or previous_box.y2 - previous_box.y1 != box.y2 - box.y1
+                if resized:
+                    self._defer_update()
+            for index, row in self._rows.iteritems():
+                row.allocate(self._get_row_box(index), flags)
+            clutter.Actor.do_allocate(self, box, flags)
+            return
         width = box.x2 - box.x1
         height = box.y2 - box.y1
         x = self._padding.x
@@ -122,37 +464,265 @@ class LightList(BaseContainer):
         clutter.Actor.do_allocate(self, box, flags)
     
     def set_clip(self, x_offset, y_offset, width, height):
-        if self._horizontal:
-            displayed_x1 = x_offset
-            displayed_x2 = x_offset + width
-            x = self._padding.x
-            for child in self._children:
-                x1 = x
-                x2 = x + self.element_size
-                if x1 < displayed_x2 and x2 > displayed_x1:
-                    child.show()
-                else:
-                    child.hide()
-                x = x2 + self._spacing.x
+        self._clip = (x_offset, y_offset, width, height)
+        if self._model is not None:
+            new_rows = self._update_rows()
+            if self._allocation_box is not None:
+                # the list allocation may not change while scrolling, new rows are allocated here
+                for index, row in new_rows:
+                    row.allocate(self._get_row_box(index), self._allocation_flags)
         else:
-            displayed_y1 = y_offset
-            displayed_y2 = y_offset + height
-            y = self._padding.y
-            for child in self._children:
-                y1 = y
-                y2 = y + self.element_size
-                if y1 < displayed_y2 and y2 > displayed_y1:
+            if self._horizontal:
+                first, last = self._get_visible_range(x_offset, width, len(self._children))
+            else:
+                first, last = self._get_visible_range(y_offset, height, len(self._children))
+            self._set_visible_range(first, last)
+        clutter.Actor.set_clip(self, x_offset, y_offset, width, height)
+    
+    def _set_visible_range(self, first, last):
+        # only children whose visibility changed since the last clip are updated
+        previous_range = self._visible_range
+        self._visible_range = (first, last)
+        if previous_range is None:
+            for index, child in enumerate(self._children):
+                if first <= index < last:
                     child.show()
                 else:
                     child.hide()
-                y = y2 + self._spacing.y
-        clutter.Actor.set_clip(self, x_offset, y_offset, width, height)
+        else:
+            previous_first, previous_last = previous_range
+            for index in xrange(previous_first, previous_last):
+                if index < first or index >= last:
+                    self._children[index].hide()
+            for index in xrange(first, last):
+                if index < previous_first or index >= previous_last:
+                    self._children[index].show()
     
     def remove_clip(self):
-        for child in self._children:
-            child.show()
+        self._clip = None
+        if self._model is not None:
+            self._update_rows()
+            self.queue_relayout()
+        else:
+            self._visible_range = None
+            for child in self._children:
+                child.show()
         clutter.Actor.remove_clip(self)
 
+class VariableLightList(LightList):
+    '''
+    VariableLightList is a LightList whose elements can have different sizes
+    
+    Element sizes (height, or width for horizontal lists) are kept in a
+    prefix-sum tree, so offset lookup, hit testing and the visible range of
+    a clip are computed in O(log n). When the list is clipped, only the
+    displayed elements are allocated. Elements are measured for the
+    allocated width (height for horizontal lists) and measured again when
+    it changes.
+    '''
+    __gtype_name__ = 'VariableLightList'
+    
+    def __init__(self, padding=0, spacing=0, horizontal=False, buffer_size=0):
+        LightList.__init__(self, element_size=0, padding=padding, spacing=spacing, horizontal=horizontal, buffer_size=buffer_size)
+        self._sizes = PrefixSumTree()
+        # width (height for horizontal lists) the sizes were measured for, -1 if unknown
+        self._measure_length = -1
+    
+    def set_model(self, model, row_factory=None, row_binder=None):
+        raise Exception('%s cannot be backed by a model' % self)
+    
+    def _get_main_spacing(self):
+        if self._horizontal:
+            return self._spacing.x
+        return self._spacing.y
+    
+    def _get_main_padding(self):
+        if self._horizontal:
+            return self._padding.x
+        return self._padding.y
+    
+    def _measure(self, actor):
+        if self._horizontal:
+            return actor.get_preferred_width(self._measure_length)[1]
+        else:
+            return actor.get_preferred_height(self._measure_length)[1]
+    
+    def _set_measure_length(self, length):
+        # returns True if the content length changed
+        if length == self._measure_length:
+            return False
+        self._measure_length = length
+        previous_length = self._get_content_length()
+        spacing = self._get_main_spacing()
+        self._sizes.rebuild([self._measure(child) + spacing for child in self._children])
+        return self._get_content_length() != previous_length
+    
+    def do_add(self, *children):
+        LightList.do_add(self, *children)
+        for child in children:
+            self._sizes.append(self._measure(child) + self._get_main_spacing())
+    
+    def do_remove(self, *children):
+        indexes = [self._child_index(child) for child in children if child in self._children_set]
+        LightList.do_remove(self, *children)
+        for index in sorted(indexes, reverse=True):
+            self._sizes.pop(index)
+    
+    def add_actor_after(self, actor, after, size=None):
+        try:
+            index = self._child_index(after)
+        except ValueError:
+            raise ValueError('Actor %s is not a children of %s' %(after, self))
+        LightList.add_actor_after(self, actor, after)
+        if size is None:
+            size = self._measure(actor)
+        self._sizes.insert(index, size + self._get_main_spacing())
+    
+    def insert(self, index, actor, size=None):
+        LightList.insert(self, index, actor)
+        if size is None:
+            size = self._measure(actor)
+        self._sizes.insert(index, size + self._get_main_spacing())
+    
+    def clear(self):
+        LightList.clear(self)
+        self._sizes = PrefixSumTree()
+    
+    def remove(self, child_or_index):
+        if child_or_index in self._children_set:
+            index = self._child_index(child_or_index)
+        else:
+            index = child_or_index
+        child = LightList.remove(self, child_or_index)
+        self._sizes.pop(index)
+        return child
+    
+    def remove_all(self):
+        LightList.remove_all(self)
+        self._sizes = PrefixSumTree()
+    
+    def get_element_size(self, index):
+        return self._sizes[index] - self._get_main_spacing()
+    
+    def set_element_size(self, child_or_index, size=None):
+        '''
+        Updates the size of an element, the size is measured again if not given.
+        Only the offsets tree is updated, elements outside the clip are not
+        reallocated.
+        '''
+        if isinstance(child_or_index, int):
+            index = child_or_index
+        else:
+            index = self._child_index(child_or_index)
+        if size is None:
+            size = self._measure(self._children[index])
+        self._sizes.update(index, size + self._get_main_spacing())
+        self.queue_relayout()
+    
+    def get_offset(self, index):
+        '''Returns the position of an element in the list, it can be used to scroll to this element'''
+        return self._get_main_padding() + self._sizes.prefix(index)
+    
+    def get_index_at(self, position):
+        '''Returns the index of the element at the given position in the list or None'''
+        index = self._sizes.search(position - self._get_main_padding())
+        if index >= len(self._sizes):
+            return None
+        if position >= self.get_offset(index) + self.get_element_size(index):
+            # position is in spacing
+            return None
+        return index
+    
+    def _get_visible_range(self, offset, length, count):
+        if count == 0 or length <= 0:
+            return 0, 0
+        padding = self._get_main_padding()
+        first = min(self._sizes.search(offset - padding), count)
+        last = min(self._sizes.search(offset + length - padding) + 1, count)
+        return first, max(first, last)
+    
+    def _get_content_length(self):
+        if not self._children:
+            return 0
+        return self._sizes.total() - self._get_main_spacing()
+    
+    def do_get_preferred_width(self, for_height):
+        preferred_width = 2*self._padding.x
+        if self._children:
+            if self._horizontal:
+                preferred_width += self._get_content_length()
+            else:
+                if for_height == -1:
+                    h = for_height - 2*self._padding.y
+                else:
+                    h = for_height
+                preferred_width += self._children[0].get_preferred_width(for_height=h)[1]
+        return preferred_width, preferred_width
+    
+    def do_get_preferred_height(self, for_width):
+        preferred_height = 2*self._padding.y
+        if self._children:
+            if self._horizontal:
+                if for_width == -1:
+                    w = for_width - 2*self._padding.x
+                else:
+                    w = for_width
+                preferred_height += self._children[0].get_preferred_height(for_width=w)[1]
+            else:
+                preferred_height += self._get_content_length()
+        return preferred_height, preferred_height
+    
+    def _allocate_range(self, first, last, flags):
+        width = self._allocation_box.x2 - self._allocation_box.x1
+        height = self._allocation_box.y2 - self._allocation_box.y1
+        offset = self.get_offset(first)
+        spacing = self._get_main_spacing()
+        for index in xrange(first, last):
+            size = self._sizes[index] - spacing
+            child_box = clutter.ActorBox()
+            if self._horizontal:
+                child_box.x1 = offset
+                child_box.y1 = self._padding.y
+                child_box.x2 = offset + size
+                child_box.y2 = height - self._padding.y
+            else:
+                child_box.x1 = self._padding.x
+                child_box.y1 = offset
+                child_box.x2 = width - self._padding.x
+                child_box.y2 = offset + size
+            self._children[index].allocate(child_box, flags)
+            offset += size + spacing
+    
+    def do_allocate(self, box, flags):
+        self._allocation_box = clutter.ActorBox(box.x1, box.y1, box.x2, box.y2)
+        self._allocation_flags = flags
+        if self._horizontal:
+            length = box.y2 - box.y1 - 2*self._padding.y
+        else:
+            length = box.x2 - box.x1 - 2*self._padding.x
+        if self._set_measure_length(length):
+            # the preferred size changed
+            self._defer_update()
+        if self._clip is not None:
+            x_offset, y_offset, width, height = self._clip
+            if self._horizontal:
+                first, last = self._get_visible_range(x_offset, width, len(self._children))
+            else:
+                first, last = self._get_visible_range(y_offset, height, len(self._children))
+            self._set_visible_range(first, last)
+        else:
+            first, last = 0, len(self._children)
+        self._allocate_range(first, last, flags)
+        clutter.Actor.do_allocate(self, box, flags)
+    
+    def set_clip(self, x_offset, y_offset, width, height):
+        LightList.set_clip(self, x_offset, y_offset, width, height)
+        if self._allocation_box is not None:
+            # the list allocation may not change while scrolling, displayed elements are allocated here
+            first, last = self._visible_range
+            self._allocate_range(first, last, self._allocation_flags)
+
+
 if __name__ == '__main__':
     stage = clutter.Stage()
     stage.connect('destroy', clutter.main_quit)
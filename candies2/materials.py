@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*
+
+import collections
+import clutter
+from clutter import cogl
+
+
+# cogl materials can modulate a texture by a color
+TINT_ENABLED = hasattr(cogl, 'Material')
+
+class TintCache(object):
+    """
+    Cache of materials drawing a texture modulated by a color, shared by all
+    actors so that rectangles painted with the same texture and color use
+    the same material (and can be batched by cogl). The least recently used
+    materials are dropped when there are more than max_size materials.
+    """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._materials = collections.OrderedDict()
+
+    def set_source(self, texture, red, green, blue, alpha):
+        """
+        Sets texture modulated by a (not premultiplied) color as cogl source.
+        Returns False when materials are not available, the source is not
+        changed then.
+        """
+        if not TINT_ENABLED:
+            return False
+        key = (id(texture), red, green, blue, alpha)
+        try:
+            material = self._materials.pop(key)[1]
+        except KeyError:
+            material = cogl.Material()
+            # material colors are premultiplied
+            material.set_color(clutter.Color(red * alpha / 255, green * alpha / 255, blue * alpha / 255, alpha))
+            material.set_layer(0, texture)
+            if len(self._materials) >= self.max_size:
+                self._materials.popitem(last=False)
+        # the texture is kept so that its id is not reused
+        self._materials[key] = (texture, material)
+        cogl.set_source(material)
+        return True
+
+    def clear(self):
+        self._materials.clear()
+
+TINTS = TintCache()
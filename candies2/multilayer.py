@@ -2,11 +2,11 @@
 # -*- coding: utf-8 -*-
 
 import clutter
-from container import BaseContainer
+from container import BaseContainer, PreferredSizeCache, AllocationCache
 import common
 
 
-class MultiLayerContainer(BaseContainer):
+class MultiLayerContainer(PreferredSizeCache, AllocationCache, BaseContainer):
     __gtype_name__ = 'MultiLayerContainer'
     '''
     A container in wich all childs have the same space allocated
@@ -16,70 +16,78 @@ class MultiLayerContainer(BaseContainer):
         self._margin = common.Margin(margin)
 
     def insert_actor(self, index, actor):
-        if actor in self._children:
+        if actor in self._children_set:
             raise Exception('Actor %s is already a children of %s' % (actor, self))
         actor.set_parent(self)
-        self._children.insert(index, actor)
+        self._insert_child(index, actor)
         self.queue_relayout()
 
     def add_actor_after(self, actor, after):
-        if actor in self._children:
+        if actor in self._children_set:
             raise Exception('Actor %s is already a children of %s' % (actor, self))
         try:
-            index = self._children.index(after)
+            index = self._child_index(after)
         except ValueError:
             raise ValueError('Actor %s is not a children of %s' % (after, self))
         actor.set_parent(self)
-        self._children.insert(index, actor)
+        self._insert_child(index, actor)
         self.queue_relayout()
 
     def remove_all(self):
         for child in self._children:
             child.unparent()
-        self._children = list()
+        self._clear_children()
         self.queue_relayout()
 
-    def do_get_preferred_width(self, for_height):
+    do_get_preferred_width = PreferredSizeCache.do_get_preferred_width
+    do_get_preferred_height = PreferredSizeCache.do_get_preferred_height
+
+    def _compute_preferred_width(self, for_height):
         preferred_width = 2 * self._margin.x
         for child in self._children:
             preferred_width = max(preferred_width, child.get_preferred_width(for_height=for_height)[1])
         return preferred_width, preferred_width
 
-    def do_get_preferred_height(self, for_width):
+    def _compute_preferred_height(self, for_width):
         preferred_height = 2 * self._margin.y
         for child in self._children:
             preferred_height = max(preferred_height, child.get_preferred_height(for_width=for_width)[1])
         return preferred_height, preferred_height
 
     def do_raise_child(self, child, sibling=None):
-        if child not in self._children:
+        if child not in self._children_set:
             raise Exception('Actor %s is not a child of %s' % (child, self))
         if sibling:
-            if sibling not in self._children:
+            if sibling not in self._children_set:
                 raise Exception('Actor %s is not a child of %s' % (sibling, self))
-            sibling_index = self._children.index(sibling)
-            child_index = self._children.index(child)
+            sibling_index = self._child_index(sibling)
+            child_index = self._child_index(child)
             self._children[sibling_index] = child
             self._children[child_index] = sibling
+            self._children_reordered()
         else:
-            self._children.remove(child)
-            self._children.append(child)
+            self._remove_child(child)
+            self._append_child(child)
 
     def do_lower_child(self, child, sibling=None):
-        if child not in self._children:
+        if child not in self._children_set:
             raise Exception('Actor %s is not a child of %s' % (child, self))
         if sibling:
-            if sibling not in self._children:
+            if sibling not in self._children_set:
                 raise Exception('Actor %s is not a child of %s' % (sibling, self))
-            sibling_index = self._children.index(sibling)
-            child_index = self._children.index(child)
+            sibling_index = self._child_index(sibling)
+            child_index = self._child_index(child)
             self._children[sibling_index] = child
             self._children[child_index] = sibling
+            self._children_reordered()
         else:
-            self._children.remove(child)
-            self._children.insert(0, child)
+            self._remove_child(child)
+            self._insert_child(0, child)
 
     def do_allocate(self, box, flags):
+        if self._allocation_unchanged(box, flags, self._children):
+            clutter.Actor.do_allocate(self, box, flags)
+            return
         main_width = box.x2 - box.x1
         main_height = box.y2 - box.y1
         for child in self._children:
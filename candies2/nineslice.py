@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*
+
+import collections
+import clutter
+from clutter import cogl
+from materials import TINTS
+
+
+def _color_tuple(color):
+    return color.red, color.green, color.blue, color.alpha
+
+def rasterize_corner(radius, border_width, samples=4):
+    """
+    Returns the coverage masks (white RGBA bytearrays) of the fill and of
+    the border of the top left corner of a round rectangle: radius x radius
+    squares, antialiased with samples x samples points per pixel.
+    """
+    fill = bytearray('\xff' * (radius * radius * 4))
+    border = bytearray('\xff' * (radius * radius * 4))
+    radius2 = radius * radius
+    inner_radius = radius - border_width
+    if inner_radius > 0:
+        inner_radius2 = inner_radius * inner_radius
+    else:
+        inner_radius2 = -1
+    total = samples * samples
+    offsets = [(k + 0.5) / samples for k in xrange(samples)]
+    for y in xrange(radius):
+        for x in xrange(radius):
+            outer_count = 0
+            inner_count = 0
+            for offset_y in offsets:
+                dy = radius - y - offset_y
+                for offset_x in offsets:
+                    dx = radius - x - offset_x
+                    d2 = dx * dx + dy * dy
+                    if d2 <= radius2:
+                        outer_count += 1
+                        if d2 <= inner_radius2:
+                            inner_count += 1
+            offset = (y * radius + x) * 4 + 3
+            fill[offset] = (inner_count * 255 + total / 2) / total
+            border[offset] = ((outer_count - inner_count) * 255 + total / 2) / total
+    return fill, border
+
+def tint_corner(fill, border, color, border_color):
+    """Returns the RGBA pixels of a corner from its masks and (r, g, b, a) colors"""
+    data = bytearray(len(fill))
+    for offset in xrange(3, len(fill), 4):
+        inner_coverage = fill[offset] / 255.0 * color[3] / 255.0
+        border_coverage = border[offset] / 255.0 * border_color[3] / 255.0
+        alpha = inner_coverage + border_coverage
+        if alpha > 0:
+            for channel in xrange(3):
+                value = (color[channel] * inner_coverage + border_color[channel] * border_coverage) / alpha
+                data[offset - 3 + channel] = int(round(value))
+            data[offset] = int(round(min(alpha, 1.0) * 255))
+    return data
+
+
+def _new_texture(data, radius):
+    # returns the clutter texture (keeping the cogl texture alive) and its
+    # cogl texture, the same handle is painted every time so that the
+    # materials of TINTS keyed by it are reused
+    texture = clutter.Texture()
+    texture.set_from_rgb_data(buffer(data), True, radius, radius, radius * 4, 4, 0)
+    return texture, texture.get_cogl_texture()
+
+class CornerCache(object):
+    """
+    Cache of corner textures shared by all actors. Corners are white
+    coverage masks keyed by radius and border width, tinted with the colors
+    and the paint opacity when painted. When cogl materials are not
+    available, tinted corners are cached by colors too. The least recently
+    used corners are dropped when there are more than max_size corners.
+    """
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self._masks = collections.OrderedDict()
+        self._corners = collections.OrderedDict()
+
+    def _get_lru(self, entries, key, build, *args):
+        try:
+            value = entries.pop(key)
+        except KeyError:
+            value = build(*args)
+            if len(entries) >= self.max_size:
+                entries.popitem(last=False)
+        entries[key] = value
+        return value
+
+    def _build_masks(self, radius, border_width):
+        fill, border = rasterize_corner(radius, border_width)
+        fill_texture = _new_texture(fill, radius)
+        if border_width > 0:
+            border_texture = _new_texture(border, radius)
+        else:
+            border_texture = (None, None)
+        return fill, border, fill_texture, border_texture
+
+    def get_masks(self, radius, border_width):
+        """Returns the fill and border (None without border) mask cogl textures"""
+        fill, border, fill_texture, border_texture = self._get_lru(self._masks, (radius, border_width), self._build_masks, radius, border_width)
+        return fill_texture[1], border_texture[1]
+
+    def _build_corner(self, radius, border_width, color, border_color):
+        fill, border = self._get_lru(self._masks, (radius, border_width), self._build_masks, radius, border_width)[:2]
+        return _new_texture(tint_corner(fill, border, color, border_color), radius)
+
+    def get_corner(self, radius, border_width, color, border_color):
+        """Returns a corner cogl texture tinted with (r, g, b, a) colors"""
+        key = (radius, border_width, color, border_color)
+        return self._get_lru(self._corners, key, self._build_corner, radius, border_width, color, border_color)[1]
+
+    def clear(self):
+        self._masks.clear()
+        self._corners.clear()
+
+CORNERS = CornerCache()
+
+def _rectangle(x1, y1, x2, y2):
+    if x2 > x1 and y2 > y1:
+        cogl.rectangle(x1, y1, x2, y2)
+
+def _paint_corners(x1, y1, x2, y2, radius):
+    cogl.rectangle_with_texture_coords(x1, y1, x1 + radius, y1 + radius, 0, 0, 1, 1)
+    cogl.rectangle_with_texture_coords(x2 - radius, y1, x2, y1 + radius, 1, 0, 0, 1)
+    cogl.rectangle_with_texture_coords(x1, y2 - radius, x1 + radius, y2, 0, 1, 1, 0)
+    cogl.rectangle_with_texture_coords(x2 - radius, y2 - radius, x2, y2, 1, 1, 0, 0)
+
+def paint_round_rectangle(x1, y1, x2, y2, radius, color, border_width=0, border_color=None):
+    """
+    Paints a round rectangle without cogl path: corners are textures from
+    CORNERS, edges and center are plain rectangles. color and border_color
+    are clutter colors (including the paint opacity).
+    """
+    radius = int(round(min(radius, (x2 - x1) / 2.0, (y2 - y1) / 2.0)))
+    if border_color is None or border_width <= 0:
+        border_width = 0
+        border_color = color
+    if radius > 0:
+        fill_mask, border_mask = CORNERS.get_masks(radius, border_width)
+        if TINTS.set_source(fill_mask, *_color_tuple(color)):
+            _paint_corners(x1, y1, x2, y2, radius)
+            if border_mask is not None:
+                TINTS.set_source(border_mask, *_color_tuple(border_color))
+                _paint_corners(x1, y1, x2, y2, radius)
+        else:
+            cogl.set_source_texture(CORNERS.get_corner(radius, border_width, _color_tuple(color), _color_tuple(border_color)))
+            _paint_corners(x1, y1, x2, y2, radius)
+    if border_width > 0:
+        cogl.set_source_color(border_color)
+        _rectangle(x1 + radius, y1, x2 - radius, y1 + border_width)
+        _rectangle(x1 + radius, y2 - border_width, x2 - radius, y2)
+        _rectangle(x1, y1 + radius, x1 + border_width, y2 - radius)
+        _rectangle(x2 - border_width, y1 + radius, x2, y2 - radius)
+    cogl.set_source_color(color)
+    _rectangle(x1 + border_width, y1 + max(radius, border_width), x2 - border_width, y2 - max(radius, border_width))
+    if radius > border_width:
+        _rectangle(x1 + radius, y1 + border_width, x2 - radius, y1 + radius)
+        _rectangle(x1 + radius, y2 - radius, x2 - radius, y2 - border_width)
@@ -5,6 +5,37 @@ import gobject
 import clutter
 from clutter import cogl
 import math
+from roundrect import PathCache
+
+
+# angles are rounded to ANGLE_STEP degrees so that animated percents reuse
+# the paths of the previous frames
+ANGLE_STEP = 0.5
+PERCENT_ROUND_PATHS = PathCache(max_size=256)
+
+def _quantize_angle(angle):
+    return round(angle / ANGLE_STEP) * ANGLE_STEP
+
+def _build_sector_path(width, height, init_angle, end_angle):
+    cogl.path_arc(width/2, height/2, width/2, height/2,\
+                  init_angle, end_angle)
+    cogl.path_line_to(width / 2, height / 2)
+    
+    end_x = width/2 + math.cos(math.radians(init_angle))*width/2
+    
+    end_y = height/2 + math.sin(math.radians(init_angle))*height/2
+    cogl.path_line_to(end_x, end_y)
+    cogl.path_close()
+
+def _build_line_path(width, height):
+    cogl.path_line(width/2, height/2,width, height/2)
+    cogl.path_close()
+
+def _build_init_sector_path(width, height, init_angle):
+    cogl.path_arc(width/2, height/2, width/2, height/2, 0, init_angle)
+    cogl.path_line_to(width / 2, height / 2)
+    cogl.path_line_to(width, height/2)
+    cogl.path_close()
 
 class PercentRound(clutter.Actor):
     """
@@ -53,29 +84,19 @@ class PercentRound(clutter.Actor):
 
     def __paint_circle(self, width, height, color):
         if self.percent != 0 :
-            init_angle = self.init_percent*360/100
-            end_angle = (self.init_percent+self.percent)*360/100
-            cogl.path_arc(width/2, height/2, width/2, height/2,\
-                          init_angle, end_angle)
-            cogl.path_line_to(width / 2, height / 2)
-            
-            end_x = width/2 + math.cos(math.radians(init_angle))*width/2
-            
-            end_y = height/2 + math.sin(math.radians(init_angle))*height/2
-            cogl.path_line_to(end_x, end_y)
+            init_angle = _quantize_angle(self.init_percent*360/100)
+            end_angle = _quantize_angle((self.init_percent+self.percent)*360/100)
+            key = ('sector', width, height, init_angle, end_angle)
+            PERCENT_ROUND_PATHS.set_current_path(key, _build_sector_path, width, height, init_angle, end_angle)
         else :
-            cogl.path_line(width/2, height/2,width, height/2)
-        cogl.path_close()
+            PERCENT_ROUND_PATHS.set_current_path(('line', width, height), _build_line_path, width, height)
         cogl.set_source_color(color)
         cogl.path_fill()
 
         if self.init_percent != 0 :
-            init_angle = self.init_percent*360/100
-            cogl.path_new()
-            cogl.path_arc(width/2, height/2, width/2, height/2, 0, init_angle)
-            cogl.path_line_to(width / 2, height / 2)
-            cogl.path_line_to(width, height/2)
-            cogl.path_close()
+            init_angle = _quantize_angle(self.init_percent*360/100)
+            key = ('init', width, height, init_angle)
+            PERCENT_ROUND_PATHS.set_current_path(key, _build_init_sector_path, width, height, init_angle)
             paint_color = self._color2.copy()
             real_alpha = self.get_paint_opacity() * paint_color.alpha / 255
             paint_color.alpha = real_alpha
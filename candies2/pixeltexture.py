@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*
+
+import threading
+import gobject
+import clutter
+
+
+def _get_rowstride(data, width, bpp):
+    # 2-D (or 3-D) numpy arrays give their own rowstride, other buffers
+    # (including 1-D arrays and memoryviews) must be packed
+    strides = getattr(data, 'strides', None)
+    if strides and len(strides) >= 2:
+        return strides[0]
+    return width * bpp
+
+
+class PixelTexture(clutter.Texture):
+    '''
+    PixelTexture class
+        A texture updated from any object supporting the buffer protocol
+        (NumPy array, bytearray, mmap, str...). Pixels are RGB or RGBA bytes,
+        the data is given to clutter without any copy in Python.
+
+        set_pixels and update_area upload pixels immediately (they must be
+        called from the main loop thread).
+
+        With double buffering, a producer (which can run in another thread
+        if gobject.threads_init was called) fills the buffer returned by
+        get_back_buffer, then calls swap_buffers: the filled buffer is
+        uploaded from the main loop, and the previous one is given back as
+        the next back buffer. Frames swapped faster than the main loop runs
+        are dropped, only the last one is uploaded.
+    '''
+    __gtype_name__ = 'PixelTexture'
+
+    def __init__(self, width, height, has_alpha=True, double_buffer=False):
+        clutter.Texture.__init__(self)
+        self._width = width
+        self._height = height
+        self._has_alpha = has_alpha
+        if has_alpha:
+            self._bpp = 4
+        else:
+            self._bpp = 3
+        self._lock = threading.Lock()
+        self._front_buffer = None
+        self._back_buffer = None
+        self._upload_source = None
+        if double_buffer:
+            self._front_buffer = bytearray(width * height * self._bpp)
+            self._back_buffer = bytearray(width * height * self._bpp)
+        self.set_size(width, height)
+
+    def get_pixels_size(self):
+        return self._width, self._height
+
+    def set_pixels(self, data, rowstride=None):
+        if rowstride is None:
+            rowstride = _get_rowstride(data, self._width, self._bpp)
+        if len(buffer(data)) < rowstride * (self._height - 1) + self._width * self._bpp:
+            raise ValueError('Pixels buffer is too small for %s' % self)
+        self.set_from_rgb_data(buffer(data), self._has_alpha, self._width, self._height, rowstride, self._bpp, 0)
+
+    def update_area(self, data, x, y, width, height, rowstride=None):
+        if x < 0 or y < 0 or x + width > self._width or y + height > self._height:
+            raise ValueError('Area (%s, %s, %s, %s) is out of %s' % (x, y, width, height, self))
+        if rowstride is None:
+            rowstride = _get_rowstride(data, width, self._bpp)
+        self.set_area_from_rgb_data(buffer(data), self._has_alpha, x, y, width, height, rowstride, self._bpp, 0)
+
+    def get_back_buffer(self):
+        if self._back_buffer is None:
+            raise Exception('Double buffering is not enabled for %s' % self)
+        return self._back_buffer
+
+    def swap_buffers(self):
+        '''Hands the back buffer over for display and returns the new back buffer'''
+        if self._back_buffer is None:
+            raise Exception('Double buffering is not enabled for %s' % self)
+        self._lock.acquire()
+        try:
+            self._front_buffer, self._back_buffer = self._back_buffer, self._front_buffer
+            if self._upload_source is None:
+                self._upload_source = gobject.idle_add(self._upload_front_buffer)
+            return self._back_buffer
+        finally:
+            self._lock.release()
+
+    def _upload_front_buffer(self):
+        self._lock.acquire()
+        try:
+            self._upload_source = None
+            self.set_pixels(self._front_buffer)
+        finally:
+            self._lock.release()
+        return False
+
+    def do_destroy(self):
+        self.unparent()
+        if hasattr(self, '_upload_source'):
+            if self._upload_source is not None:
+                gobject.source_remove(self._upload_source)
+                self._upload_source = None
+
+
+if __name__ == '__main__':
+    import math
+    import time
+
+    stage = clutter.Stage()
+    stage.set_size(256, 256)
+    stage.connect('destroy', clutter.main_quit)
+
+    heatmap = PixelTexture(256, 256, has_alpha=False, double_buffer=True)
+    stage.add(heatmap)
+
+    def produce():
+        frame = heatmap.get_back_buffer()
+        phase = time.time()
+        for y in xrange(256):
+            value = int(127 + 127 * math.sin(phase + y / 20.0))
+            frame[y * 768:(y + 1) * 768] = chr(value) * 768
+        heatmap.swap_buffers()
+        return True
+    gobject.timeout_add(40, produce)
+
+    stage.show()
+    clutter.main()
@@ -6,6 +6,7 @@ import clutter
 import os
 
 from clutter import cogl
+from nineslice import paint_round_rectangle
 
 class ProgressBar(clutter.Actor):
     __gtype_name__ = 'ProgressBar'
@@ -31,6 +32,12 @@ class ProgressBar(clutter.Actor):
         self._progress = 0.0
         self._horizontal = horizontal
         self._reverse = reverse
+        self._nine_slice = False
+    
+    def set_nine_slice(self, boolean):
+        # paint colored rectangles with shared corner textures instead of cogl paths
+        self._nine_slice = boolean
+        self.queue_redraw()
     
     def set_progress(self, value):
         if value > 1.0: self._progress = 1.0
@@ -101,7 +108,16 @@ class ProgressBar(clutter.Actor):
         else:
             raise TypeError('Unknown property ' + pspec.name)
     
-    def __paint_rectangle(self, width, height, border_color, inner_color=None, progress_color=None):
+    def __fill_round_rectangle(self, x1, y1, x2, y2, radius, color, nine_slice):
+        if nine_slice:
+            paint_round_rectangle(x1, y1, x2, y2, radius, color)
+        else:
+            clutter.cogl.path_round_rectangle(x1, y1, x2, y2, radius, 1)
+            clutter.cogl.path_close()
+            clutter.cogl.set_source_color(color)
+            clutter.cogl.path_fill()
+    
+    def __paint_rectangle(self, width, height, border_color, inner_color=None, progress_color=None, nine_slice=False):
         # check if size will not cause problem with radius
         radius = self._radius
         if width < 2 * radius:
@@ -110,10 +126,7 @@ class ProgressBar(clutter.Actor):
             radius = int(float(height) / 2.0)
         
         # background round rectangle
-        clutter.cogl.path_round_rectangle(0, 0, width, height, radius, 1)
-        clutter.cogl.path_close()
-        clutter.cogl.set_source_color(border_color)
-        clutter.cogl.path_fill()
+        self.__fill_round_rectangle(0, 0, width, height, radius, border_color, nine_slice)
         
         if self._border_width > 0 and inner_color is not None:
             inner_width = int(width - 2*self._border_width)
@@ -133,10 +146,7 @@ class ProgressBar(clutter.Actor):
                 padding_y = int((height - inner_height) / 2.0)
                 
                 # foreground round rectangle
-                clutter.cogl.path_round_rectangle(padding_x, padding_y, padding_x + inner_width, padding_y + inner_height, inner_radius, 1)
-                clutter.cogl.path_close()
-                clutter.cogl.set_source_color(inner_color)
-                clutter.cogl.path_fill()
+                self.__fill_round_rectangle(padding_x, padding_y, padding_x + inner_width, padding_y + inner_height, inner_radius, inner_color, nine_slice)
                 
                 # texture
                 if self._texture:
@@ -174,10 +184,7 @@ class ProgressBar(clutter.Actor):
                                 x2 = width - padding_x
                                 y2 = progress_y + progress_height
                             
-                            clutter.cogl.path_round_rectangle(x1, y1, x2, y2, progress_radius, 1)
-                            clutter.cogl.path_close()
-                            clutter.cogl.set_source_color(progress_color)
-                            clutter.cogl.path_fill()
+                            self.__fill_round_rectangle(x1, y1, x2, y2, progress_radius, progress_color, nine_slice)
                             
                             # progress_texture
                             if self._progress_texture:
@@ -212,10 +219,7 @@ class ProgressBar(clutter.Actor):
                                 x2 = progress_x + progress_width
                                 y2 = height - padding_y
                             
-                            clutter.cogl.path_round_rectangle(x1, y1, x2, y2, progress_radius, 1)
-                            clutter.cogl.path_close()
-                            clutter.cogl.set_source_color(progress_color)
-                            clutter.cogl.path_fill()
+                            self.__fill_round_rectangle(x1, y1, x2, y2, progress_radius, progress_color, nine_slice)
                             
                             # progress_texture
                             if self._progress_texture:
@@ -241,7 +245,7 @@ class ProgressBar(clutter.Actor):
         real_alpha = self.get_paint_opacity() * progress_color.alpha / 255
         progress_color.alpha = real_alpha
         
-        self.__paint_rectangle(width, height, border_color, inner_color, progress_color)
+        self.__paint_rectangle(width, height, border_color, inner_color, progress_color, self._nine_slice)
 
     def do_pick(self, pick_color):
         if self.should_pick_paint() == False:
@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*
+
+import array
+import clutter
+from clutter import cogl
+
+
+# numpy dtypes matching the array typecodes
+_DTYPES = {'f': 'float32', 'B': 'uint8'}
+
+def _to_array(typecode, values):
+    result = array.array(typecode)
+    if values is None:
+        return result
+    if hasattr(values, 'astype'):
+        # numpy array, copied without iterating on its items
+        result.fromstring(values.astype(_DTYPES[typecode]).tostring())
+    else:
+        result.extend(values)
+    return result
+
+def _color_to_tuple(color):
+    if isinstance(color, clutter.Color):
+        return color.red, color.green, color.blue, color.alpha
+    if isinstance(color, str):
+        color = clutter.color_from_string(color)
+        return color.red, color.green, color.blue, color.alpha
+    return tuple(color)
+
+
+class _RectGroup(object):
+    # rectangles of a color: corners (x1, y1, x2, y2 of each rectangle) and indexes
+
+    def __init__(self, rgba):
+        self.rgba = rgba
+        self.corners = array.array('f')
+        self.indexes = array.array('l')
+
+    def append(self, index, x1, y1, x2, y2):
+        self.corners.extend((x1, y1, x2, y2))
+        self.indexes.append(index)
+
+
+class RectBatch(clutter.Actor):
+    '''
+    RectBatch class
+        An actor drawing a lot of plain rectangles.
+        Rectangles are stored in two compact arrays (array module), or can
+        be given as NumPy arrays:
+            geometry: x, y, width, height of each rectangle (floats)
+            colors: red, green, blue, alpha of each rectangle (bytes)
+        Rectangles are drawn with cogl.rectangle without any path, cogl
+        batches them into a few draws per frame. Rectangles can be updated
+        in place with set_rect and set_rect_color.
+
+        Rectangles are grouped by color, each group is drawn after a single
+        source color change. Groups are updated in place: changing the
+        geometry of a rectangle patches its corners, changing its color
+        moves it to another group. By default (keep_order=True) only
+        consecutive rectangles of the same color are grouped, so that
+        overlapping rectangles are drawn in their order. With
+        keep_order=False all the rectangles of a color are grouped, which
+        makes fewer groups but draws rectangles of different colors in
+        any order: only use it if rectangles do not overlap.
+        When clutter supports offscreen redirection, the painted batch is
+        kept in an offscreen buffer and redrawn only when it changes.
+    '''
+    __gtype_name__ = 'RectBatch'
+
+    def __init__(self, geometry=None, colors=None, keep_order=True):
+        clutter.Actor.__init__(self)
+        self._geometry = array.array('f')
+        self._colors = array.array('B')
+        self._extent = (0, 0)
+        self._keep_order = keep_order
+        # list of _RectGroup in paint order, None until painted
+        self._groups = None
+        self._groups_by_color = dict()
+        # group and position in the group of each rectangle
+        self._rect_groups = list()
+        self._rect_positions = array.array('l')
+        # paint opacity and clutter colors by rgba
+        self._paint_opacity = None
+        self._paint_colors = dict()
+        if hasattr(self, 'set_offscreen_redirect') and hasattr(clutter, 'OFFSCREEN_REDIRECT_ALWAYS'):
+            self.set_offscreen_redirect(clutter.OFFSCREEN_REDIRECT_ALWAYS)
+        if geometry is not None:
+            self.set_rects(geometry, colors)
+
+    def set_rects(self, geometry, colors):
+        geometry = _to_array('f', geometry)
+        colors = _to_array('B', colors)
+        if len(geometry) % 4 != 0 or len(colors) != len(geometry):
+            raise ValueError('Invalid rectangles for %s, geometry and colors must have 4 values per rectangle' % self)
+        self._geometry = geometry
+        self._colors = colors
+        self._extent = None
+        self._groups = None
+        self.queue_relayout()
+
+    def get_count(self):
+        return len(self._geometry) / 4
+
+    def get_rect(self, index):
+        offset = 4 * index
+        return tuple(self._geometry[offset:offset + 4]), tuple(self._colors[offset:offset + 4])
+
+    def add_rect(self, x, y, width, height, color):
+        rgba = _color_to_tuple(color)
+        self._geometry.extend((x, y, width, height))
+        self._colors.extend(rgba)
+        index = self.get_count() - 1
+        if self._groups is not None:
+            self._group_rect(index, rgba, x, y, x + width, y + height)
+        self._extend(x + width, y + height)
+        self.queue_redraw()
+        return index
+
+    def set_rect(self, index, x, y, width, height, color=None):
+        offset = 4 * index
+        if offset < 0 or offset >= len(self._geometry):
+            raise IndexError('Invalid rectangle index %s for %s' % (index, self))
+        old_x, old_y, old_width, old_height = self._geometry[offset:offset + 4]
+        self._geometry[offset] = x
+        self._geometry[offset + 1] = y
+        self._geometry[offset + 2] = width
+        self._geometry[offset + 3] = height
+        if self._groups is not None:
+            group = self._rect_groups[index]
+            position = 4 * self._rect_positions[index]
+            group.corners[position:position + 4] = array.array('f', (x, y, x + width, y + height))
+        if color is not None:
+            self._set_color(index, color)
+        if self._extent is not None:
+            extent_width, extent_height = self._extent
+            if old_x + old_width >= extent_width or old_y + old_height >= extent_height:
+                # the rectangle may have defined the extent
+                self._extent = None
+                self.queue_relayout()
+            else:
+                self._extend(x + width, y + height)
+        self.queue_redraw()
+
+    def set_rect_color(self, index, color):
+        offset = 4 * index
+        if offset < 0 or offset >= len(self._colors):
+            raise IndexError('Invalid rectangle index %s for %s' % (index, self))
+        self._set_color(index, color)
+        self.queue_redraw()
+
+    def _set_color(self, index, color):
+        offset = 4 * index
+        rgba = _color_to_tuple(color)
+        self._colors[offset:offset + 4] = array.array('B', rgba)
+        if self._groups is not None and self._rect_groups[index].rgba != rgba:
+            if self._keep_order:
+                self._split_group(index, rgba)
+            else:
+                self._move_rect(index, rgba)
+
+    def clear(self):
+        self._geometry = array.array('f')
+        self._colors = array.array('B')
+        self._extent = (0, 0)
+        self._groups = None
+        self.queue_relayout()
+
+    def _extend(self, right, bottom):
+        if self._extent is None:
+            return
+        extent_width, extent_height = self._extent
+        if right > extent_width or bottom > extent_height:
+            self._extent = (max(right, extent_width), max(bottom, extent_height))
+            self.queue_relayout()
+
+    def _get_extent(self):
+        if self._extent is None:
+            geometry = self._geometry
+            extent_width = 0
+            extent_height = 0
+            for offset in xrange(0, len(geometry), 4):
+                extent_width = max(extent_width, geometry[offset] + geometry[offset + 2])
+                extent_height = max(extent_height, geometry[offset + 1] + geometry[offset + 3])
+            self._extent = (extent_width, extent_height)
+        return self._extent
+
+    def do_get_preferred_width(self, for_height):
+        preferred_width = self._get_extent()[0]
+        return preferred_width, preferred_width
+
+    def do_get_preferred_height(self, for_width):
+        preferred_height = self._get_extent()[1]
+        return preferred_height, preferred_height
+
+    def _group_rect(self, index, rgba, x1, y1, x2, y2):
+        # appends a new rectangle (the last one) to the groups
+        if self._keep_order:
+            if self._groups and self._groups[-1].rgba == rgba:
+                group = self._groups[-1]
+            else:
+                group = _RectGroup(rgba)
+                self._groups.append(group)
+        else:
+            group = self._groups_by_color.get(rgba)
+            if group is None:
+                group = _RectGroup(rgba)
+                self._groups_by_color[rgba] = group
+                self._groups.append(group)
+        self._rect_groups.append(group)
+        self._rect_positions.append(len(group.indexes))
+        group.append(index, x1, y1, x2, y2)
+
+    def _get_groups(self):
+        if self._groups is None:
+            geometry = self._geometry
+            colors = self._colors
+            self._groups = list()
+            self._groups_by_color = dict()
+            self._rect_groups = list()
+            self._rect_positions = array.array('l')
+            for offset in xrange(0, len(geometry), 4):
+                rgba = (colors[offset], colors[offset + 1], colors[offset + 2], colors[offset + 3])
+                x = geometry[offset]
+                y = geometry[offset + 1]
+                self._group_rect(offset / 4, rgba, x, y, x + geometry[offset + 2], y + geometry[offset + 3])
+        return self._groups
+
+    def _relocate(self, group, first_position):
+        # updates the locations of the rectangles of group from first_position
+        for position in xrange(first_position, len(group.indexes)):
+            index = group.indexes[position]
+            self._rect_groups[index] = group
+            self._rect_positions[index] = position
+
+    def _move_rect(self, index, rgba):
+        # keep_order=False: the last rectangle of the old group takes the place of the moved one
+        group = self._rect_groups[index]
+        position = self._rect_positions[index]
+        corners = group.corners[4 * position:4 * position + 4]
+        last = len(group.indexes) - 1
+        if position != last:
+            group.corners[4 * position:4 * position + 4] = group.corners[4 * last:]
+            moved = group.indexes[last]
+            group.indexes[position] = moved
+            self._rect_positions[moved] = position
+        del group.corners[4 * last:]
+        del group.indexes[last]
+        if not group.indexes:
+            self._groups.remove(group)
+            del self._groups_by_color[group.rgba]
+        new_group = self._groups_by_color.get(rgba)
+        if new_group is None:
+            new_group = _RectGroup(rgba)
+            self._groups_by_color[rgba] = new_group
+            self._groups.append(new_group)
+        self._rect_groups[index] = new_group
+        self._rect_positions[index] = len(new_group.indexes)
+        new_group.append(index, *corners)
+
+    def _split_group(self, index, rgba):
+        # keep_order=True: the run of rectangles is split around the recolored one
+        group = self._rect_groups[index]
+        position = self._rect_positions[index]
+        group_index = self._groups.index(group)
+        single = _RectGroup(rgba)
+        single.append(index, *group.corners[4 * position:4 * position + 4])
+        replacement = [single]
+        if position + 1 < len(group.indexes):
+            tail = _RectGroup(group.rgba)
+            tail.corners = group.corners[4 * (position + 1):]
+            tail.indexes = group.indexes[position + 1:]
+            self._relocate(tail, 0)
+            replacement.append(tail)
+        self._relocate(single, 0)
+        if position > 0:
+            del group.corners[4 * position:]
+            del group.indexes[position:]
+            replacement.insert(0, group)
+            group_index += 1
+            self._groups[group_index - 1:group_index] = replacement
+        else:
+            self._groups[group_index:group_index + 1] = replacement
+        # single neighbours of the same color are merged, runs do not fragment
+        if group_index + 1 < len(self._groups) and self._groups[group_index + 1].rgba == rgba:
+            self._merge_groups(group_index)
+        if group_index > 0 and self._groups[group_index - 1].rgba == rgba:
+            self._merge_groups(group_index - 1)
+
+    def _merge_groups(self, group_index):
+        # appends the group following group_index to it
+        group = self._groups[group_index]
+        following = self._groups.pop(group_index + 1)
+        first_position = len(group.indexes)
+        group.corners.extend(following.corners)
+        group.indexes.extend(following.indexes)
+        self._relocate(group, first_position)
+
+    def _get_paint_color(self, rgba, opacity):
+        if self._paint_opacity != opacity:
+            self._paint_opacity = opacity
+            self._paint_colors = dict()
+        color = self._paint_colors.get(rgba)
+        if color is None:
+            red, green, blue, alpha = rgba
+            color = clutter.Color(red, green, blue, alpha * opacity / 255)
+            self._paint_colors[rgba] = color
+        return color
+
+    def do_paint(self):
+        opacity = self.get_paint_opacity()
+        rectangle = cogl.rectangle
+        for group in self._get_groups():
+            color = self._get_paint_color(group.rgba, opacity)
+            if color.alpha == 0:
+                continue
+            cogl.set_source_color(color)
+            corners = group.corners
+            for offset in xrange(0, len(corners), 4):
+                rectangle(corners[offset], corners[offset + 1], corners[offset + 2], corners[offset + 3])
+
+
+if __name__ == '__main__':
+    import random
+
+    stage = clutter.Stage()
+    stage.set_size(640, 480)
+    stage.connect('destroy', clutter.main_quit)
+
+    geometry = array.array('f')
+    colors = array.array('B')
+    for x in xrange(0, 640, 8):
+        for y in xrange(0, 480, 8):
+            geometry.extend((x, y, 8, 8))
+            colors.extend((random.randint(0, 255), random.randint(0, 255), random.randint(0, 255), 255))
+    batch = RectBatch(geometry, colors)
+    stage.add(batch)
+
+    def blink():
+        batch.set_rect_color(random.randrange(batch.get_count()), (255, 255, 255, 255))
+        return True
+    import gobject
+    gobject.timeout_add(50, blink)
+
+    stage.show()
+    clutter.main()
@@ -6,6 +6,51 @@ import gobject
 import clutter
 
 from clutter import cogl
+from nineslice import paint_round_rectangle
+
+
+# cogl >= 1.4 can get and set the current path, a path keeps its
+# tessellation so a saved path is only tessellated once
+PATH_CACHE_ENABLED = hasattr(cogl, 'get_path') and hasattr(cogl, 'set_path')
+
+class PathCache(object):
+    """
+    Cache of cogl paths shared by all actors, keyed by their geometry (paths
+    are built in actor coordinates, so actors of the same size share them).
+    When cogl can not save paths, paths are built at each paint.
+    """
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self._paths = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def set_current_path(self, key, build, *args):
+        """Makes the path of key the current cogl path, build(*args) creates it if it is not cached"""
+        if not PATH_CACHE_ENABLED:
+            build(*args)
+            return
+        path = self._paths.get(key)
+        if path is None:
+            self.misses += 1
+            build(*args)
+            if len(self._paths) >= self.max_size:
+                self._paths.clear()
+            self._paths[key] = cogl.get_path()
+        else:
+            self.hits += 1
+            cogl.set_path(path)
+
+    def clear(self):
+        self._paths.clear()
+
+ROUND_RECTANGLE_PATHS = PathCache()
+
+def _build_round_rectangle_path(x1, y1, x2, y2, radius):
+    cogl.path_round_rectangle(x1, y1, x2, y2, radius, 1)
+    cogl.path_close()
+
 
 class OutlinedRoundRectangle(clutter.Actor):
     __gtype_name__ = 'OutlinedRoundRectangle'
@@ -98,6 +143,12 @@ class OutlinedRoundRectangle(clutter.Actor):
             self._calculate_paint_values(width, height)
             self._allocation_box = (x1, y1, x2, y2)
         
+        key = ('outlined', width, height, self._radius, self._width)
+        ROUND_RECTANGLE_PATHS.set_current_path(key, self.__build_path, width, height)
+        cogl.set_source_color(self._real_color)
+        cogl.path_fill()
+    
+    def __build_path(self, width, height):
         # external rectangle
         cogl.path_line(self._external_radius, 0, self._width_minus_external_radius, 0)
         cogl.path_arc(self._width_minus_external_radius, self._external_radius, self._external_radius, self._external_radius, -90, 0)
@@ -120,8 +171,6 @@ class OutlinedRoundRectangle(clutter.Actor):
         cogl.path_arc(self._width_plus_radius, self._width_plus_radius, self._radius, self._radius, -90, -180)
         
         cogl.path_close()
-        cogl.set_source_color(self._real_color)
-        cogl.path_fill()
     
     def do_destroy(self):
         self.unparent()
@@ -133,6 +182,10 @@ class RoundRectangle(clutter.Actor):
 
     A simple actor drawing a rectangle with round angles using the clutter.cogl
     primitives.
+
+    With set_nine_slice(True), the rectangle is painted with shared corner
+    textures and plain rectangles instead of cogl paths (paths are still
+    used for the texture).
     """
     __gtype_name__ = 'RoundRectangle'
     __gproperties__ = {
@@ -166,6 +219,11 @@ class RoundRectangle(clutter.Actor):
         self._border_color = clutter.color_from_string('Black')
         self._border_width = 0.0
         self._texture = texture
+        self._nine_slice = False
+    
+    def set_nine_slice(self, boolean):
+        self._nine_slice = boolean
+        self.queue_redraw()
     
     def get_clutter_color(self, color):
         if isinstance(color, tuple):
@@ -224,26 +282,37 @@ class RoundRectangle(clutter.Actor):
             raise TypeError('Unknown property ' + pspec.name)
 
     def __paint_rectangle(self, width, height, color, border_color=None):
-        if border_color is not None and self._border_width > 0 and self._paint_double_border_width < width and self._paint_double_border_width < height:
-            cogl.path_round_rectangle(0, 0, width, height, self._paint_radius, 1)
-            cogl.path_close()
+        has_border = border_color is not None and self._border_width > 0 and self._paint_double_border_width < width and self._paint_double_border_width < height
+        if self._nine_slice:
+            if has_border:
+                paint_round_rectangle(0, 0, width, height, self._paint_radius, color, self._border_width, border_color)
+            else:
+                paint_round_rectangle(0, 0, width, height, self._paint_radius, color)
+            # texture
+            if has_border and self._texture:
+                inner_key = (self._border_width, self._border_width, self._paint_width_minus_border_width, self._paint_height_minus_border_width, self._paint_radius_minus_border_width)
+                ROUND_RECTANGLE_PATHS.set_current_path(inner_key, _build_round_rectangle_path, *inner_key)
+                cogl.set_source_texture(self._texture)
+                cogl.path_fill()
+            return
+        outer_key = (0, 0, width, height, self._paint_radius)
+        if has_border:
+            ROUND_RECTANGLE_PATHS.set_current_path(outer_key, _build_round_rectangle_path, *outer_key)
             cogl.set_source_color(border_color)
             cogl.path_fill()
             
-            cogl.path_round_rectangle(self._border_width, self._border_width, self._paint_width_minus_border_width, self._paint_height_minus_border_width, self._paint_radius_minus_border_width, 1)
-            cogl.path_close()
+            inner_key = (self._border_width, self._border_width, self._paint_width_minus_border_width, self._paint_height_minus_border_width, self._paint_radius_minus_border_width)
+            ROUND_RECTANGLE_PATHS.set_current_path(inner_key, _build_round_rectangle_path, *inner_key)
             cogl.set_source_color(color)
             cogl.path_fill()
             
             # texture
             if self._texture:
-                cogl.path_round_rectangle(self._border_width, self._border_width, self._paint_width_minus_border_width, self._paint_height_minus_border_width, self._paint_radius_minus_border_width, 1)
-                cogl.path_close()
+                ROUND_RECTANGLE_PATHS.set_current_path(inner_key, _build_round_rectangle_path, *inner_key)
                 cogl.set_source_texture(self._texture)
                 cogl.path_fill()
         else:
-            cogl.path_round_rectangle(0, 0, width, height, self._paint_radius, 1)
-            cogl.path_close()
+            ROUND_RECTANGLE_PATHS.set_current_path(outer_key, _build_round_rectangle_path, *outer_key)
             cogl.set_source_color(color)
             cogl.path_fill()
     
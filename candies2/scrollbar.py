@@ -5,6 +5,8 @@ import os
 import gobject
 import clutter
 from container import BaseContainer
+from kinetic import KineticScroller
+from texturecache import set_texture_from_file
 
 class Scrollbar(clutter.Actor, clutter.Container):
     '''
@@ -18,7 +20,7 @@ class Scrollbar(clutter.Actor, clutter.Container):
         functions :
             .on_scroll_press : drag scroller
             .on_scroll_release : drop scroller
-            .on_scroll_move : move scroller
+            .on_scroll_move : move scroller (applied once per frame)
             .do_allocate : draw scrollbar, scroller and emit the position of scroller
             .do_foreach
             .do_paint
@@ -42,10 +44,13 @@ class Scrollbar(clutter.Actor, clutter.Container):
         self.flags = None
         self.box = None
         self.pointer_grabbed = False
+        # motion events are coalesced and applied once per frame
+        self._pending_event_position = None
+        self._motion_scroller = KineticScroller(self._on_frame_motion, kinetic=False)
         
         if bar_image_path != None and os.path.exists(bar_image_path):
             self.scrollbar_background = clutter.Texture()
-            self.scrollbar_background.set_from_file(bar_image_path)
+            set_texture_from_file(self.scrollbar_background, bar_image_path)
         else:
             self.scrollbar_background = clutter.Rectangle()
             self.scrollbar_background.set_color('LightBlue')
@@ -60,7 +65,7 @@ class Scrollbar(clutter.Actor, clutter.Container):
 
         if scroller_image_path != None and os.path.exists(scroller_image_path):
             self.scroller = clutter.Texture()
-            self.scroller.set_from_file(scroller_image_path)
+            set_texture_from_file(self.scroller, scroller_image_path)
             self.scroller_image_path = scroller_image_path
         else:
             self.scroller = clutter.Rectangle()
@@ -98,7 +103,7 @@ class Scrollbar(clutter.Actor, clutter.Container):
             self.scrollbar_background.destroy()
             self.scrollbar_background = clutter.Texture()
             self.scrollbar_background.set_parent(self)
-        self.scrollbar_background.set_from_file(path)
+        set_texture_from_file(self.scrollbar_background, path)
     
     def set_scroller_image_path(self, path):
         if isinstance(self.scroller, clutter.Rectangle):
@@ -106,7 +111,7 @@ class Scrollbar(clutter.Actor, clutter.Container):
             self.scroller.destroy()
             self.scroller = clutter.Texture()
             self.scroller.set_parent(self)
-        self.scroller.set_from_file(path)
+        set_texture_from_file(self.scroller, path)
     
     def on_mouse_scroll(self, source, event):
         current_pos = self.scroller_position_percent
@@ -128,35 +133,55 @@ class Scrollbar(clutter.Actor, clutter.Container):
         self.last_event_y = event.y
         self.last_event_x = event.x
         self.set_progress_with_event(event)
+        self._motion_scroller.press(event.x if self.h else event.y)
         if self.scroller_press_image_path is not None:
-            self.scroller.set_from_file(self.scroller_press_image_path)
+            set_texture_from_file(self.scroller, self.scroller_press_image_path)
 
     def on_scroll_release(self, source, event):
         clutter.ungrab_pointer()
         self.pointer_grabbed = False
+        if self._pending_event_position is not None:
+            self._set_progress_with_position(*self._pending_event_position)
+            self._pending_event_position = None
+        self._motion_scroller.stop()
         self.last_event_y = None
         self.last_event_x = None
         if self.scroller_press_image_path is not None and self.scroller_image_path is not None:
-            self.scroller.set_from_file(self.scroller_image_path)
+            set_texture_from_file(self.scroller, self.scroller_image_path)
 
     def on_scroll_move(self, source, event):
-        self.set_progress_with_event(event)
+        if self.last_event_y is None and self.last_event_x is None:
+            return
+        self._pending_event_position = (event.x, event.y)
+        self._motion_scroller.move(event.x if self.h else event.y)
+
+    def _on_frame_motion(self, delta):
+        if self._pending_event_position is not None:
+            self._set_progress_with_position(*self._pending_event_position)
+            self._pending_event_position = None
+        return True
     
     def is_pointer_grabbed(self):
         return self.pointer_grabbed
     
     def set_progress_with_event(self, event):
+        self._set_progress_with_position(event.x, event.y)
+    
+    def _set_progress_with_position(self, x, y):
         if self.h:
             if self.last_event_x is None: return
-            self.last_event_x = event.x - self.get_transformed_position()[0] - self.padding - self.scroller_height/2
+            self.last_event_x = x - self.get_transformed_position()[0] - self.padding - self.scroller_height/2
             position = self.last_event_x/(self.height - 2*self.padding - self.scroller_height)
             self.set_scroller_progress_percent(position)
         else:
             if self.last_event_y is None: return
-            self.last_event_y = event.y - self.get_transformed_position()[1] - self.padding - self.scroller_height/2
+            self.last_event_y = y - self.get_transformed_position()[1] - self.padding - self.scroller_height/2
             position = self.last_event_y/(self.height - 2*self.padding - self.scroller_height)
             self.set_scroller_progress_percent(position)
 
+    def callback_position(self, source, position):
+        self.set_scroller_progress_percent(position)
+
     def set_scroller_progress_percent(self, position):
         new_position = max(position, 0.0)
         new_position = min(new_position, 1.0)
@@ -164,10 +189,19 @@ class Scrollbar(clutter.Actor, clutter.Container):
             self.scroller_position_percent = new_position
             self.emit('scroll_position', self.scroller_position_percent)
             if self.scroller_height != 0 and self.height != 0:
-                self.queue_relayout()
+                # the scroller is only translated, the scrollbar is not allocated again
+                self._move_scroller()
                 if self.reallocate:
                     self.do_allocate(self.box,self.flags)
 
+    def _move_scroller(self):
+        scroller_range = self.height - 2*self.padding - self.scroller_height
+        offset = max(0, min(self.scroller_position_percent * scroller_range, scroller_range))
+        if self.h:
+            self.scroller.set_anchor_point(-offset, 0)
+        else:
+            self.scroller.set_anchor_point(0, -offset)
+
     def get_scroller_position_percent(self):
         return self.scroller_position_percent
 
@@ -269,17 +303,19 @@ class Scrollbar(clutter.Actor, clutter.Container):
             scroller_position = box_height - 2*self.padding - scroller_height
         if scroller_position <= 0:
             scroller_position = 0
+        # scroller is allocated at the beginning of the bar and translated to its position
         if self.h == False :
-            scroller_box.y1 = self.padding + scroller_position
+            scroller_box.y1 = self.padding
             scroller_box.y2 = scroller_box.y1 + scroller_height
         else :
-            scroller_box.x1 = self.padding + scroller_position
+            scroller_box.x1 = self.padding
             scroller_box.x2 = scroller_box.x1 + scroller_height
         self.scroller.allocate(scroller_box,flags)
         if scroller_height:
             self.scroller_position_percent = (scroller_position)/(box_height - 2*self.padding - scroller_height)
         else:
             self.scroller_position_percent = 0
+        self._move_scroller()
         clutter.Actor.do_allocate(self, box, flags)
 
     def do_foreach(self, func, data=None):
@@ -341,21 +377,110 @@ class Clipper(clutter.Actor, clutter.Container):
         variables :
             .actor : clutter.Actor object to move
         functions :
-            .callback_position : need float which indicate how to move clipper
-            .do_allocate : move clipper
+            .callback_position : need float which indicate how to move clipper,
+                                 only the actor translation and clip are changed
+            .set_kinetic : enable dragging the actor anywhere, with deceleration
+                           after release (emits scroll_position)
+            .do_allocate : allocate actor and move clipper
             .do_foreach
             .do_paint
             .do_pick 
     '''
     __gtype_name__ = 'Clipper'
+    __gsignals__ = {'scroll_position': (gobject.SIGNAL_RUN_LAST, gobject.TYPE_NONE, [gobject.TYPE_FLOAT])}
     
-    def __init__(self, actor=None, expand=False):
+    # distance (in pixels) the pointer must move before a press becomes a drag
+    DRAG_THRESHOLD = 10
+    
+    def __init__(self, actor=None, expand=False, kinetic=False):
         clutter.Actor.__init__(self)
         self.actor = actor
         if self.actor is not None:
             self.actor.set_parent(self)
         self.clipper_position = 0
         self.expand = expand
+        self._box_width = 0
+        self._box_height = 0
+        self._actor_height = None
+        self._translation = None
+        self._kinetic_scroller = None
+        self._kinetic_handlers = list()
+        self._press_y = None
+        self._dragging = False
+        self.set_kinetic(kinetic)
+    
+    def set_kinetic(self, kinetic):
+        if kinetic and self._kinetic_scroller is None:
+            self._kinetic_scroller = KineticScroller(self._on_kinetic_scroll)
+            self.set_reactive(True)
+            self._kinetic_handlers = [
+                self.connect('captured-event', self._on_captured_event),
+                self.connect('motion-event', self._on_drag_motion),
+                self.connect('button-release-event', self._on_drag_release),
+            ]
+        elif not kinetic and self._kinetic_scroller is not None:
+            self._stop_drag()
+            self._kinetic_scroller.stop()
+            self._kinetic_scroller = None
+            for handler in self._kinetic_handlers:
+                self.disconnect(handler)
+            self._kinetic_handlers = list()
+    
+    def is_kinetic(self):
+        return self._kinetic_scroller is not None
+    
+    def _on_captured_event(self, source, event):
+        # events are seen here before reaching the actor, a drag is started
+        # only when the pointer moved enough so that clicks still work
+        if self._dragging:
+            return False
+        if event.type == clutter.BUTTON_PRESS:
+            self._press_y = event.y
+            self._kinetic_scroller.press(event.y)
+        elif event.type == clutter.MOTION and self._press_y is not None:
+            if abs(event.y - self._press_y) >= self.DRAG_THRESHOLD:
+                self._dragging = True
+                clutter.grab_pointer(self)
+                self._kinetic_scroller.move(event.y)
+                return True
+        elif event.type == clutter.BUTTON_RELEASE:
+            self._press_y = None
+        return False
+    
+    def _on_drag_motion(self, source, event):
+        if self._dragging:
+            self._kinetic_scroller.move(event.y)
+            return True
+        return False
+    
+    def _on_drag_release(self, source, event):
+        if self._dragging:
+            self._stop_drag()
+            self._kinetic_scroller.release(event.y)
+            return True
+        return False
+    
+    def _stop_drag(self):
+        if self._dragging:
+            self._dragging = False
+            clutter.ungrab_pointer()
+        self._press_y = None
+    
+    def _on_kinetic_scroll(self, delta):
+        # called once per frame with the pointer move since the last frame
+        if self.actor is None or self._actor_height is None:
+            return False
+        scroll_range = self._actor_height - self._box_height
+        if scroll_range <= 0:
+            return False
+        position = self.clipper_position - float(delta) / scroll_range
+        position = min(max(position, 0.0), 1.0)
+        if position == self.clipper_position:
+            return False
+        self.clipper_position = position
+        self._update_translation()
+        self.emit('scroll_position', self.clipper_position)
+        return True
     
     def get_actor(self):
         return self.actor
@@ -370,10 +495,24 @@ class Clipper(clutter.Actor, clutter.Container):
         if self.actor is not None:
             self.actor.unparent()
         self.actor = None
+        self._actor_height = None
+        self._translation = None
         
     def callback_position(self, source, position):
         self.clipper_position = position
-        self.queue_relayout()
+        if self._actor_height is None:
+            self.queue_relayout()
+        else:
+            # the actor size did not change, only its translation and clip are updated
+            self._update_translation()
+    
+    def _update_translation(self):
+        position = int(self.clipper_position * (self._actor_height - self._box_height))
+        translation = (position, self._box_width, self._box_height)
+        if translation != self._translation:
+            self._translation = translation
+            self.actor.set_anchor_point(0, position)
+            self.actor.set_clip(0, position, self._box_width, self._box_height)
     
     def do_get_preferred_width(self, for_height):
         if self.actor is not None:
@@ -393,17 +532,15 @@ class Clipper(clutter.Actor, clutter.Container):
         box_width = box.x2 - box.x1
         box_height = box.y2 - box.y1
         
+        self._box_width = box_width
+        self._box_height = box_height
         if self.actor is not None:
+            self._actor_height = self.actor.get_preferred_size()[3]
+            self._update_translation()
             if self.expand == True:
-                position = int(self.clipper_position * (self.actor.get_preferred_size()[3] - box_height))
-                self.actor.set_anchor_point(0, position)
-                self.actor.set_clip(0, position, box_width, box_height)
                 objbox = clutter.ActorBox(0, 0, box_width, box_height)
                 self.actor.allocate(objbox, flags)
             else:
-                position = int(self.clipper_position * (self.actor.get_preferred_size()[3] - box_height))
-                self.actor.set_anchor_point(0, position)
-                self.actor.set_clip(0, position, box_width, box_height)
                 self.actor.allocate_preferred_size(flags)
         clutter.Actor.do_allocate(self, box, flags)
         
@@ -416,11 +553,17 @@ class Clipper(clutter.Actor, clutter.Container):
             self.actor.paint()
 
     def do_pick(self, color):
+        if self._kinetic_scroller is not None:
+            # the whole clipper area can be dragged
+            clutter.Actor.do_pick(self, color)
         if self.actor is not None:
             self.actor.paint()
     
     def do_destroy(self):
         self.unparent()
+        if hasattr(self, '_kinetic_scroller'):
+            if self._kinetic_scroller:
+                self._kinetic_scroller.stop()
         if hasattr(self, 'actor'):
             if self.actor:
                 self.actor.unparent()
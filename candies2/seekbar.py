@@ -5,6 +5,7 @@ import gobject
 import clutter
 import os
 import common
+from texturecache import set_texture_from_file
 
 
 class SeekBar(clutter.Actor, clutter.Container):
@@ -101,7 +102,7 @@ class SeekBar(clutter.Actor, clutter.Container):
         # bar
         if bar_image_path and os.path.isfile(bar_image_path):
             self.bar = clutter.Texture()
-            self.bar.set_from_file(bar_image_path)
+            set_texture_from_file(self.bar, bar_image_path)
         else:
             self.bar = clutter.Rectangle()
             self.bar.set_color(bar_color)
@@ -115,7 +116,7 @@ class SeekBar(clutter.Actor, clutter.Container):
         # cursor
         if cursor_image_path and os.path.isfile(cursor_image_path):
             self.cursor = clutter.Texture()
-            self.cursor.set_from_file(cursor_image_path)
+            set_texture_from_file(self.cursor, cursor_image_path)
         else:
             self.cursor = clutter.Rectangle()
             self.cursor.set_color('Gray')
@@ -254,13 +255,13 @@ class SeekBar(clutter.Actor, clutter.Container):
                     start_marker = None
                 else:
                     start_marker = clutter.Texture()
-                    start_marker.set_from_file(self._sequence_markers_image_paths[0])
+                    set_texture_from_file(start_marker, self._sequence_markers_image_paths[0])
                     start_marker.set_parent(self)
                 if sequence[1] is None:
                     stop_marker = None
                 else:
                     stop_marker = clutter.Texture()
-                    stop_marker.set_from_file(self._sequence_markers_image_paths[1])
+                    set_texture_from_file(stop_marker, self._sequence_markers_image_paths[1])
                     stop_marker.set_parent(self)
                 self._sequence_markers.append((start_marker, stop_marker))
 
@@ -2,13 +2,13 @@
 # -*- coding: utf-8 -*-
 
 import clutter
-from container import BaseContainer
+from container import BaseContainer, PreferredSizeCache
 from buttons import ImageButton
 from list import LightList
 import common
 import math
 
-class Slider(BaseContainer):
+class Slider(PreferredSizeCache, BaseContainer):
     __gtype_name__ = 'Slider'
     
     def __init__(self, elements_per_page=3, margin=0, spacing=10, horizontal=True, keep_ratio=False, h_align='center', v_align='middle', pick_enabled=True):
@@ -273,7 +273,10 @@ class Slider(BaseContainer):
         self._width = 0
         self.queue_relayout()
     
-    def do_get_preferred_width(self, for_height):
+    do_get_preferred_width = PreferredSizeCache.do_get_preferred_width
+    do_get_preferred_height = PreferredSizeCache.do_get_preferred_height
+
+    def _compute_preferred_width(self, for_height):
         preferred_width = 2 * self._margin.x
         elements_size = self._elements_preferred_size
         if for_height == -1:
@@ -296,7 +299,7 @@ class Slider(BaseContainer):
                 preferred_width += 2 * self._buttons_width + self._spacing.x + 3 * (elements_size[0] + self._spacing.x)
         return preferred_width, preferred_width
 
-    def do_get_preferred_height(self, for_width):
+    def _compute_preferred_height(self, for_width):
         preferred_height = 2 * self._margin.y
         elements_size = self._elements_preferred_size
         if for_width == -1:
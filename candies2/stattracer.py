@@ -1,135 +1,345 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*
 
+import array
+import collections
 import gobject
 import clutter
 from clutter import cogl
 import math
+from roundrect import PathCache
+
+
+def stroke_outline(values, width, height, n, stroke_width):
+    """
+    Returns the polygon (list of (x, y) points) of a stroke of stroke_width
+    under the curve of values (percents), n values fill the width.
+    The lower edge points are the intersections of the segments lines
+    offset by stroke_width.
+    """
+    count = len(values)
+    if count == 0:
+        return list()
+    scale_x = width / float(n)
+    xs = [i * scale_x for i in xrange(count)]
+    ys = [height - (value * height) / 100.0 for value in values]
+    slopes = [(ys[i + 1] - ys[i]) / scale_x for i in xrange(count - 1)]
+    # vertical distance between a segment and its line offset by stroke_width
+    offsets = [stroke_width * math.sqrt(1 + slope * slope) for slope in slopes]
+    lower = [(xs[0], ys[0] + stroke_width)]
+    for i in xrange(1, count - 1):
+        a = slopes[i]
+        c = slopes[i - 1]
+        if a != c:
+            b = ys[i] - a * xs[i] + offsets[i]
+            d = ys[i] - c * xs[i] + offsets[i - 1]
+            x = (d - b) / (a - c)
+            lower.append((x, a * x + b))
+        else:
+            lower.append((xs[i], ys[i] + stroke_width))
+    if count > 1:
+        lower.append((xs[-1], ys[-1] + stroke_width))
+    lower.reverse()
+    return zip(xs, ys) + lower
+
+
+def band_outline(buckets, first_index, bucket_size, width, height, n, stroke_width):
+    """
+    Returns the polygon (list of (x, y) points) of a band going through the
+    max values of buckets (list of [bucket index, min, max]) on its upper
+    edge and stroke_width under their min values on its lower edge.
+    first_index is the index of the first displayed sample.
+    """
+    scale_x = width / float(n)
+    upper = list()
+    lower = list()
+    for index, minimum, maximum in buckets:
+        x = max(0, index * bucket_size - first_index) * scale_x
+        upper.append((x, height - (maximum * height) / 100.0))
+        lower.append((x, height - (minimum * height) / 100.0 + stroke_width))
+    lower.reverse()
+    return upper + lower
+
+def _build_outline_path(points):
+    cogl.path_move_to(*points[0])
+    for x, y in points[1:]:
+        cogl.path_line_to(x, y)
+    cogl.path_close()
+
+
+class TracerSeries(object):
+    """
+    Samples of a Tracer curve, kept in a ring buffer of n values.
+
+    When there are more samples than pixel columns, samples are decimated:
+    the min and max of every bucket_size samples are kept, and updated
+    when samples are appended.
+    """
+
+    def __init__(self, n, color='Green'):
+        self.color = clutter.color_from_string(color)
+        self._samples = array.array('f', [0.0]) * n
+        self._start = 0
+        self._count = 0
+        # number of samples appended since the last set_values
+        self._total = 0
+        # decimation buckets: [bucket index, min, max], bucket index is the
+        # index of its first sample divided by bucket_size
+        self._bucket_size = 1
+        self._buckets = None
+        # incremented when samples change, used to invalidate the outline
+        self.version = 0
+        self._outline = None
+        self._outline_key = None
+        # cogl path of the last outline, built again only with the outline
+        self.paths = PathCache(max_size=1)
+
+    def __len__(self):
+        return self._count
+
+    def get_capacity(self):
+        return len(self._samples)
+
+    def append(self, value):
+        capacity = len(self._samples)
+        if self._count < capacity:
+            self._samples[(self._start + self._count) % capacity] = value
+            self._count += 1
+        else:
+            self._samples[self._start] = value
+            self._start = (self._start + 1) % capacity
+        if self._buckets is not None:
+            self._add_to_buckets(self._total, value)
+        self._total += 1
+        self.version += 1
+
+    def _add_to_buckets(self, sample_index, value):
+        index = sample_index // self._bucket_size
+        if self._buckets and self._buckets[-1][0] == index:
+            bucket = self._buckets[-1]
+            if value < bucket[1]:
+                bucket[1] = value
+            elif value > bucket[2]:
+                bucket[2] = value
+        else:
+            self._buckets.append([index, value, value])
+
+    def set_bucket_size(self, bucket_size):
+        """
+        Sets the number of samples decimated in a bucket (1 disables the
+        decimation), buckets are computed again from the samples.
+        """
+        if bucket_size == self._bucket_size:
+            return
+        self._bucket_size = bucket_size
+        if bucket_size <= 1:
+            self._buckets = None
+        else:
+            capacity = len(self._samples)
+            self._buckets = collections.deque(maxlen=capacity // bucket_size + 2)
+            first_index = self._total - self._count
+            for i, value in enumerate(self.get_values()):
+                self._add_to_buckets(first_index + i, value)
+        self.version += 1
+
+    def get_values(self):
+        capacity = len(self._samples)
+        end = self._start + self._count
+        if end <= capacity:
+            return self._samples[self._start:end].tolist()
+        return self._samples[self._start:].tolist() + self._samples[:end - capacity].tolist()
+
+    def set_values(self, values):
+        capacity = len(self._samples)
+        self._start = 0
+        self._count = 0
+        self._total = 0
+        if self._buckets is not None:
+            self._buckets.clear()
+        for value in list(values)[-capacity:]:
+            self.append(value)
+        self.version += 1
+
+    def set_capacity(self, n):
+        values = self.get_values()
+        self._samples = array.array('f', [0.0]) * n
+        bucket_size = self._bucket_size
+        self._bucket_size = 1
+        self._buckets = None
+        self.set_values(values)
+        self.set_bucket_size(bucket_size)
+
+    def get_outline(self, width, height, n, stroke_width):
+        # decimate when there are more samples than pixel columns
+        self.set_bucket_size(max(1, int(math.ceil(n / max(1.0, width)))))
+        key = (self.version, width, height, n, stroke_width)
+        if key != self._outline_key:
+            if self._buckets is None:
+                self._outline = stroke_outline(self.get_values(), width, height, n, stroke_width)
+            elif self._buckets:
+                first_index = self._total - self._count
+                # drop buckets of samples which are all out of the ring buffer
+                while (self._buckets[0][0] + 1) * self._bucket_size <= first_index:
+                    self._buckets.popleft()
+                self._outline = band_outline(self._buckets, first_index, self._bucket_size,
+                                             width, height, n, stroke_width)
+            else:
+                self._outline = list()
+            self._outline_key = key
+        return self._outline
+
+    def get_outline_key(self):
+        return self._outline_key
+
 
 class Tracer(clutter.Actor):
     """
     Tracer (clutter.Actor)
 
+    Draws the last n values (percents) of one or several series on a shared
+    axis. The default series is named 'default', others are added with
+    add_series. Samples are kept in ring buffers and the curves outlines are
+    only computed again when new samples arrive or the size changes.
+    When n is larger than the width in pixels, the min and max values of
+    each pixel column are drawn.
     """
     __gtype_name__ = 'test'
     __gproperties__ = {
         'color' : (str, 'color', 'Color', None, gobject.PARAM_READWRITE),
     }
 
+    DEFAULT_SERIES = 'default'
+
     def __init__(self, color='Green', n=50, stroke_width=3, with_scale=False):
         clutter.Actor.__init__(self)
         self._stroke_width = stroke_width
-        self._color = clutter.color_from_string(color)
-        self.percent = list()
         self.n = n
         self.with_scale = with_scale
+        self._series = {self.DEFAULT_SERIES: TracerSeries(n, color)}
+        self._series_order = [self.DEFAULT_SERIES]
 
-    def update(self, value):
-        self.percent.append(value)
-        if len(self.percent) > self.n:
-            self.percent.pop(0)
+    def _get_series(self, name):
+        if name is None:
+            name = self.DEFAULT_SERIES
+        try:
+            return self._series[name]
+        except KeyError:
+            raise KeyError('Tracer %s has no series %s' % (self, name))
+
+    def add_series(self, name, color='Green'):
+        if name in self._series:
+            raise KeyError('Tracer %s already has a series %s' % (self, name))
+        self._series[name] = TracerSeries(self.n, color)
+        self._series_order.append(name)
+        self.queue_redraw()
+
+    def remove_series(self, name):
+        self._get_series(name)
+        del self._series[name]
+        self._series_order.remove(name)
+        self.queue_redraw()
+
+    def get_series_names(self):
+        return list(self._series_order)
+
+    def add_value(self, value, series=None):
+        """Appends a sample to a series (to the default series as tracer.percent.append did)"""
+        self._get_series(series).append(value)
+        self.queue_redraw()
+
+    def update(self, value, series=None):
+        self.add_value(value, series)
+
+    def get_values(self, series=None):
+        return self._get_series(series).get_values()
+
+    def set_values(self, values, series=None):
+        self._get_series(series).set_values(values)
+        self.queue_redraw()
+
+    def _get_percent(self):
+        return tuple(self.get_values())
+
+    # values of the default series, read only: use add_value or set_values
+    percent = property(_get_percent)
+
+    def set_n(self, n):
+        self.n = n
+        for series in self._series.itervalues():
+            series.set_capacity(n)
         self.queue_redraw()
 
-    def set_color(self, color):
-        self._color = clutter.color_from_string(color)
+    def set_color(self, color, series=None):
+        self._get_series(series).color = clutter.color_from_string(color)
         self.queue_redraw()
 
     def set_stroke_width(self, width):
         self._stroke_width = width
+        self.queue_redraw()
 
     def do_set_property(self, pspec, value):
         if pspec.name == 'color':
-            self._color = self.set_color(value)
+            self.set_color(value)
         else:
             raise TypeError('Unknown property ' + pspec.name)
 
     def do_get_property(self, pspec):
         if pspec.name == 'color':
-            return self._color
+            return self._get_series(None).color
         else:
             raise TypeError('Unknown property ' + pspec.name)
 
-    def __cogl_path(self, width, height, color):
-        
-        if self.with_scale :
-            cogl.set_source_color(clutter.color_from_string('#ffffffff'))
-            #rect
-            cogl.path_move_to(0,0)
-            cogl.path_line_to(0,height)
-            cogl.path_line_to(width,height)
-            cogl.path_line_to(width,0)
-            cogl.path_line_to(0,0)
-            cogl.path_line_to(3,3)
-            cogl.path_line_to(3,height-3)
-            cogl.path_line_to(width-3,height-3)
-            cogl.path_line_to(width-3,3)
-            cogl.path_line_to(3,3)
-            cogl.path_close()
-            cogl.path_fill()
-            #0.25 stroke
-            cogl.path_rectangle(0,height*0.25,width, height*0.25+1)
-            cogl.path_fill()
-            cogl.path_close()
-            #0.5 stroke
-            cogl.path_rectangle(0,height*0.5,width,height*0.5+1)
-            cogl.path_close()
-            cogl.path_fill()
-            #0.75 stroke
-            cogl.path_rectangle(0,height*0.75, width, height*0.75+1)
-            cogl.path_close()
-            cogl.path_fill()
-
-        #stats
-        cogl.set_source_color(color)
-        scale_x = width/float(self.n)
-        
-        for i, value in enumerate(self.percent):
-            y = height - (value*height)/100
-            x = i*scale_x
-            if i == 0:
-                cogl.path_move_to(x,y)
-            else :
-                cogl.path_line_to(x,y)
-
-        for i, value in enumerate(reversed(self.percent)):
-            x = (len(self.percent)-i -1)*scale_x
-            y = height - (value*height)/100
-            if i != 0 and i != len(self.percent) -1  :
-                diff_y = (value - self.percent[-i])*height/100
-                a = diff_y/scale_x
-                if a == 0 :
-                    dist = self._stroke_width
-                else :
-                    alpha = math.atan(1/a)
-                    dist = self._stroke_width/math.sin(alpha)
-                b = y - a*x + abs(dist)
-                
-                diff_y = (self.percent[-i-2] - value)*height/100
-                c = diff_y/scale_x
-                if c == 0 :
-                    dist = self._stroke_width
-                else :
-                    alpha = math.atan(1/c)
-                    dist = self._stroke_width/math.sin(alpha)
-                d = y - c*x + abs(dist)
-                
-                if a-c != 0.0  :
-                    x = (d-b)/(a-c)
-                    y = a*x + b
-                else :
-                    y = y + self._stroke_width
-            else :
-                y = y + self._stroke_width
-            cogl.path_line_to(x,y)
+    def __cogl_scale(self, width, height):
+        cogl.set_source_color(clutter.color_from_string('#ffffffff'))
+        #rect
+        cogl.path_move_to(0,0)
+        cogl.path_line_to(0,height)
+        cogl.path_line_to(width,height)
+        cogl.path_line_to(width,0)
+        cogl.path_line_to(0,0)
+        cogl.path_line_to(3,3)
+        cogl.path_line_to(3,height-3)
+        cogl.path_line_to(width-3,height-3)
+        cogl.path_line_to(width-3,3)
+        cogl.path_line_to(3,3)
+        cogl.path_close()
+        cogl.path_fill()
+        #0.25 stroke
+        cogl.path_rectangle(0,height*0.25,width, height*0.25+1)
+        cogl.path_fill()
+        cogl.path_close()
+        #0.5 stroke
+        cogl.path_rectangle(0,height*0.5,width,height*0.5+1)
+        cogl.path_close()
+        cogl.path_fill()
+        #0.75 stroke
+        cogl.path_rectangle(0,height*0.75, width, height*0.75+1)
         cogl.path_close()
         cogl.path_fill()
 
+    def __cogl_path(self, width, height, color=None):
+        if self.with_scale and color is None:
+            self.__cogl_scale(width, height)
+
+        #stats
+        opacity = self.get_paint_opacity()
+        for name in self._series_order:
+            series = self._series[name]
+            points = series.get_outline(width, height, self.n, self._stroke_width)
+            if not points:
+                continue
+            if color is None:
+                paint_color = series.color.copy()
+                paint_color.alpha = opacity * paint_color.alpha / 255
+                cogl.set_source_color(paint_color)
+            else:
+                cogl.set_source_color(color)
+            series.paths.set_current_path(series.get_outline_key(), _build_outline_path, points)
+            cogl.path_fill()
+
     def do_paint(self):
         (x1, y1, x2, y2) = self.get_allocation_box()
-        paint_color = self._color.copy()
-        real_alpha = self.get_paint_opacity() * paint_color.alpha / 255
-        paint_color.alpha = real_alpha
-        self.__cogl_path(x2 - x1, y2 - y1, paint_color)
+        self.__cogl_path(x2 - x1, y2 - y1)
 
     def do_pick(self, pick_color):
         if self.should_pick_paint() == False:
@@ -147,9 +357,11 @@ if __name__ == '__main__':
     percent = [1,10,20,100,50,40,45,40,50,42]
     percent = [1,50,100,40,1]
 
-    test = Tracer(n=len(percent)-1)
-    test.percent = percent
+    test = Tracer(n=len(percent))
+    test.set_values(percent)
     test.set_color('Red')
+    test.add_series('load', color='#0000ff88')
+    test.set_values([10, 30, 20, 60, 30], series='load')
     test.set_size(400, 100)
     test.set_position(10, 240)
     stage.add(test)
@@ -5,6 +5,7 @@ import gobject
 import clutter
 import common
 from aligner import Aligner
+from container import PreferredSizeCache, AllocationCache, PaintCulling
 
 class TableCellAligner(Aligner):
     __gtype_name__ = 'TableCellAligner'
@@ -12,7 +13,7 @@ class TableCellAligner(Aligner):
     def __init__(self, **args):
         Aligner.__init__(self, **args)
 
-class Table(clutter.Actor, clutter.Container):
+class Table(PreferredSizeCache, AllocationCache, PaintCulling, clutter.Actor, clutter.Container):
     __gtype_name__ = 'Table'
     """
     A container which presents actors in a table layout
@@ -161,20 +162,24 @@ class Table(clutter.Actor, clutter.Container):
     def insert_row(self, index, height='auto'):
         self._rows.insert(index, height)
         self._matrix.insert(index, [None for i in range(len(self._columns))])
+        self.queue_relayout()
     
     def add_row(self, height='auto'):
         self._rows.append(height)
         self._matrix.append([None for i in range(len(self._columns))])
+        self.queue_relayout()
     
     def insert_column(self, index, width='auto'):
         self._columns.insert(index, width)
         for i in range(len(self._rows)):
             self._matrix[i].insert(index, None)
+        self.queue_relayout()
     
     def add_column(self, width='auto'):
         self._columns.append(width)
         for i in range(len(self._rows)):
             self._matrix[i].append(None)
+        self.queue_relayout()
     
     def set_row_height(self, index, height):
         if index < len(self._rows):
@@ -190,7 +195,10 @@ class Table(clutter.Actor, clutter.Container):
         else:
             raise IndexError('Can not set column width in table %s, table has only %s columns' %(self, self._columns))
     
-    def do_get_preferred_width(self, for_height=-1):
+    do_get_preferred_width = PreferredSizeCache.do_get_preferred_width
+    do_get_preferred_height = PreferredSizeCache.do_get_preferred_height
+
+    def _compute_preferred_width(self, for_height=-1):
         preferred_width = (len(self._columns) - 1) * self._spacing.x + 2*self._margin.x - 2*self._padding.x
         for j in range(len(self._columns)):
             column_width = 0
@@ -202,7 +210,7 @@ class Table(clutter.Actor, clutter.Container):
         #print preferred_width
         return preferred_width, preferred_width
 
-    def do_get_preferred_height(self, for_width=-1):
+    def _compute_preferred_height(self, for_width=-1):
         preferred_height = (len(self._rows) - 1) * self._spacing.y + 2*self._margin.y - 2*self._padding.y
         for i in range(len(self._rows)):
             row_height = 0
@@ -215,6 +223,9 @@ class Table(clutter.Actor, clutter.Container):
         return preferred_height, preferred_height
     
     def do_allocate(self, box, flags):
+        if self._allocation_unchanged(box, flags, self._children):
+            clutter.Actor.do_allocate(self, box, flags)
+            return
         width = box.x2 - box.x1
         height = box.y2 - box.y1
         inner_width = width - 2*self._margin.x - 2*self._padding.x
@@ -319,8 +330,7 @@ class Table(clutter.Actor, clutter.Container):
                     func(actor, data)
         
     def do_paint(self):
-        for child in self._children:
-            child.paint()
+        self._paint_children(self._children)
     
     def do_pick(self, color):
         if self.pick_enabled:
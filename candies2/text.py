@@ -5,6 +5,7 @@ import sys
 import gobject
 import clutter
 import common
+from container import PreferredSizeCache
 from roundrect import RoundRectangle
 
 class StretchText(clutter.Text):
@@ -92,7 +93,7 @@ class StretchText(clutter.Text):
         clutter.Text.do_allocate(self, box, flags)
 
 
-class TextContainer(clutter.Actor, clutter.Container):
+class TextContainer(PreferredSizeCache, clutter.Actor, clutter.Container):
     __gtype_name__ = 'TextContainer'
     __gproperties__ = {
         'text' : (
@@ -243,7 +244,10 @@ class TextContainer(clutter.Actor, clutter.Container):
         else:
             raise TypeError('Unknown property ' + pspec.name)
     
-    def do_get_preferred_width(self, for_height):
+    do_get_preferred_width = PreferredSizeCache.do_get_preferred_width
+    do_get_preferred_height = PreferredSizeCache.do_get_preferred_height
+
+    def _compute_preferred_width(self, for_height):
         if for_height != -1:
             h = for_height - 2*self._margin.y - 2*self._padding.y
         else:
@@ -251,7 +255,7 @@ class TextContainer(clutter.Actor, clutter.Container):
         min, nat = self.label.get_preferred_width(h)
         return min + 2*self._margin.x + 2*self._padding.x, nat + 2*self._margin.x + 2*self._padding.x
     
-    def do_get_preferred_height(self, for_width):
+    def _compute_preferred_height(self, for_width):
         if for_width != -1:
             w = for_width - 2*self._margin.x - 2*self._padding.x
         else:
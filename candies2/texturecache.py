@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*
+
+import os
+import collections
+import clutter
+from clutter import cogl
+
+try:
+    from gtk import gdk
+except ImportError:
+    gdk = None
+
+
+def _get_texture_bytes(handle):
+    if hasattr(handle, 'get_width'):
+        width, height = handle.get_width(), handle.get_height()
+    else:
+        width, height = cogl.texture_get_width(handle), cogl.texture_get_height(handle)
+    return width * height * 4
+
+
+class _CacheEntry(object):
+
+    def __init__(self, key, handle, holder, size):
+        self.key = key
+        self.handle = handle
+        # clutter texture owning the cogl texture of a resized image
+        self.holder = holder
+        self.size = size
+        self.refcount = 0
+
+
+class _Assignment(object):
+    # cache texture set on a clutter texture, kept on its GObject because
+    # python wrappers of actors are transient
+
+    def __init__(self):
+        self.handle = None
+
+
+class TextureCache(object):
+    """
+    Process-wide cache of decoded image files, keyed by path, modification
+    time and requested size. The same cogl texture is handed out to every
+    user of an image, each acquire must be balanced by a release.
+
+    Released textures stay in the cache and are dropped in least recently
+    used order when the total size of the cached textures exceeds max_bytes
+    (textures in use are never dropped). Images are decoded at their
+    requested size when gtk.gdk is available, at their file size otherwise.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = dict()
+        self._entries_by_handle = dict()
+        # released entries, least recently used first
+        self._unused = collections.OrderedDict()
+        self._size = 0
+        # GObject data key of the assignments of this cache
+        self._assignment_key = 'candies2-texture-cache-%d' % id(self)
+
+    def get_size(self):
+        return self._size
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _decode(self, path, width, height):
+        if (width > 0 or height > 0) and gdk is not None:
+            pixbuf = gdk.pixbuf_new_from_file_at_size(path, width, height)
+            holder = clutter.Texture()
+            holder.set_from_rgb_data(pixbuf.get_pixels(), pixbuf.get_has_alpha(), pixbuf.get_width(), pixbuf.get_height(), pixbuf.get_rowstride(), pixbuf.get_n_channels(), 0)
+            return holder.get_cogl_texture(), holder
+        handle = cogl.texture_new_from_file(path, cogl.TEXTURE_NO_SLICING, cogl.PIXEL_FORMAT_ANY)
+        return handle, None
+
+    def acquire(self, path, width=-1, height=-1):
+        """Returns the cogl texture of an image file and takes a reference on it"""
+        key = (path, os.stat(path).st_mtime, width, height)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            handle, holder = self._decode(path, width, height)
+            entry = _CacheEntry(key, handle, holder, _get_texture_bytes(handle))
+            self._entries[key] = entry
+            self._entries_by_handle[id(handle)] = entry
+            self._size += entry.size
+        else:
+            self.hits += 1
+            self._unused.pop(key, None)
+        entry.refcount += 1
+        self._evict()
+        return entry.handle
+
+    def release(self, handle):
+        entry = self._entries_by_handle.get(id(handle))
+        if entry is None or entry.handle is not handle:
+            raise Exception('Texture %s is not in %s' % (handle, self))
+        if entry.refcount <= 0:
+            raise Exception('Texture %s of %s is already released' % (handle, self))
+        entry.refcount -= 1
+        if entry.refcount == 0:
+            self._unused[entry.key] = entry
+            self._evict()
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._unused:
+            key, entry = self._unused.popitem(last=False)
+            del self._entries[key]
+            del self._entries_by_handle[id(entry.handle)]
+            self._size -= entry.size
+
+    def clear(self):
+        """Drops the released textures"""
+        for key, entry in self._unused.items():
+            del self._entries[key]
+            del self._entries_by_handle[id(entry.handle)]
+            self._size -= entry.size
+        self._unused.clear()
+
+    def set_texture_from_file(self, texture, path, width=-1, height=-1):
+        """
+        Replacement of clutter.Texture.set_from_file: the image of texture
+        comes from the cache, it is released when another image is set or
+        when texture is destroyed.
+        """
+        handle = self.acquire(path, width, height)
+        assignment = texture.get_data(self._assignment_key)
+        if assignment is None:
+            assignment = _Assignment()
+            texture.set_data(self._assignment_key, assignment)
+            texture.connect('destroy', self._on_texture_destroy)
+        previous = assignment.handle
+        texture.set_cogl_texture(handle)
+        assignment.handle = handle
+        if previous is not None:
+            self.release(previous)
+
+    def unset_texture(self, texture):
+        assignment = texture.get_data(self._assignment_key)
+        if assignment is not None and assignment.handle is not None:
+            handle = assignment.handle
+            assignment.handle = None
+            self.release(handle)
+
+    def _on_texture_destroy(self, texture):
+        self.unset_texture(texture)
+
+TEXTURES = TextureCache()
+
+def set_texture_from_file(texture, path, width=-1, height=-1):
+    TEXTURES.set_texture_from_file(texture, path, width, height)
+
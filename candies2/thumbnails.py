@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*
+
+import os
+import urllib
+import hashlib
+from imageloader import IMAGES, pack_pixbuf, unpack_pixbuf
+
+try:
+    from gtk import gdk
+except ImportError:
+    gdk = None
+
+
+# freedesktop thumbnail directories and their maximum sizes
+THUMBNAIL_SIZES = (('normal', 128), ('large', 256), ('x-large', 512), ('xx-large', 1024))
+
+def get_default_cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'thumbnails')
+
+def get_uri(path):
+    return 'file://' + urllib.quote(os.path.abspath(path))
+
+def _load_thumbnail(thumbnail_path, mtime):
+    # returns the thumbnail pixbuf if it is up to date, None otherwise
+    try:
+        pixbuf = gdk.pixbuf_new_from_file(thumbnail_path)
+    except Exception:
+        return None
+    if pixbuf.get_option('tEXt::Thumb::MTime') != str(mtime):
+        return None
+    return pixbuf
+
+def _generate_thumbnail(path, uri, thumbnail_path, size, mtime):
+    # images already within the bounds are not scaled up
+    info = gdk.pixbuf_get_file_info(path)
+    if info is not None and info[1] <= size and info[2] <= size:
+        pixbuf = gdk.pixbuf_new_from_file(path)
+    else:
+        pixbuf = gdk.pixbuf_new_from_file_at_size(path, size, size)
+    directory = os.path.dirname(thumbnail_path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory, 0700)
+    temp_path = '%s.%d.tmp' % (thumbnail_path, os.getpid())
+    pixbuf.save(temp_path, 'png', {'tEXt::Thumb::URI': uri, 'tEXt::Thumb::MTime': str(mtime)})
+    os.chmod(temp_path, 0600)
+    os.rename(temp_path, thumbnail_path)
+    return pixbuf
+
+def _get_thumbnail(path, uri, thumbnail_path, size, mtime):
+    # runs in a process of the pool, returns (packed pixbuf or None on error, generated)
+    pixbuf = _load_thumbnail(thumbnail_path, mtime)
+    if pixbuf is not None:
+        return pack_pixbuf(pixbuf), False
+    try:
+        return pack_pixbuf(_generate_thumbnail(path, uri, thumbnail_path, size, mtime)), True
+    except Exception:
+        return None, True
+
+
+class ThumbnailLoader(object):
+    """
+    Loads images bounded by a size through an on-disk thumbnail cache using
+    the freedesktop layout (thumbnails are PNG files named after the md5 of
+    the file URI, in a directory per size, with Thumb::URI and Thumb::MTime
+    metadata). Thumbnails are loaded, and generated when missing or
+    outdated, in the process pool of loader (IMAGES by default, see
+    ImageLoader). Images smaller than the thumbnail size are not scaled up.
+    callback(pixbuf, *args) is called from the main loop, with None as
+    pixbuf if the image can not be decoded.
+
+    Sizes larger than the largest thumbnail size are loaded directly from
+    the image file. Loading is not available without gtk.gdk.
+    """
+
+    def __init__(self, cache_dir=None, loader=IMAGES):
+        if cache_dir is None:
+            cache_dir = get_default_cache_dir()
+        self.cache_dir = cache_dir
+        self._loader = loader
+        self.hits = 0
+        self.misses = 0
+
+    def is_available(self):
+        return gdk is not None and self._loader.is_available()
+
+    def get_thumbnail_path(self, path, size):
+        """Returns the path of the thumbnail of path for size, or None if size is too large"""
+        for name, max_size in THUMBNAIL_SIZES:
+            if size <= max_size:
+                filename = hashlib.md5(get_uri(path)).hexdigest() + '.png'
+                return os.path.join(self.cache_dir, name, filename)
+        return None
+
+    def _get_thumbnail_size(self, size):
+        for name, max_size in THUMBNAIL_SIZES:
+            if size <= max_size:
+                return max_size
+        return None
+
+    def load(self, path, size, callback=None, *args):
+        thumbnail_size = self._get_thumbnail_size(size)
+        if thumbnail_size is None or os.path.abspath(path).startswith(self.cache_dir + os.sep):
+            return self._loader.load(path, size, size, callback, *args)
+        job = (path, get_uri(path), self.get_thumbnail_path(path, size), thumbnail_size, int(os.stat(path).st_mtime))
+        return self._loader.run(_get_thumbnail, job, self._on_thumbnail_loaded, callback, *args)
+
+    def _on_thumbnail_loaded(self, result, callback, *args):
+        # result is None if the job failed
+        data, generated = result or (None, True)
+        if generated:
+            self.misses += 1
+        else:
+            self.hits += 1
+        if callback is not None:
+            if data is None:
+                callback(None, *args)
+            else:
+                callback(unpack_pixbuf(data), *args)
+
+THUMBNAILS = ThumbnailLoader()
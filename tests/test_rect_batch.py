@@ -0,0 +1,25 @@
+import array
+import clutter
+import random
+import time
+from candies2 import RectBatch
+
+stage = clutter.Stage()
+stage.connect('destroy', clutter.main_quit)
+
+coef = 1
+tic = time.time()
+geometry = array.array('f')
+colors = array.array('B')
+for x in xrange(640/coef):
+    for y in xrange(480/coef):
+        geometry.extend((x*coef, y*coef, coef, coef))
+        colors.extend((random.randint(0, 255), random.randint(0, 255), random.randint(0, 255), 255))
+batch = RectBatch(geometry, colors)
+stage.add(batch)
+tac = time.time()
+
+print 'Generated in', tac - tic, 'seconds.'
+
+stage.show()
+clutter.main()